@@ -1,4 +1,6 @@
-from flask import Flask, request, jsonify, render_template_string, redirect, url_for, session
+from flask import Flask, request, jsonify, redirect, url_for, session
+from sqlalchemy import text
+from werkzeug.middleware.proxy_fix import ProxyFix
 from models.database import db, AppConfig
 from config import SQLALCHEMY_DATABASE_URI, SQLALCHEMY_ENGINE_OPTIONS, SECRET_KEY
 from routes.main import register_routes
@@ -6,17 +8,42 @@ from middleware.ip_logger import check_ip_blacklist, log_ip_access
 from middleware.mobile_check import check_mobile_only_access
 from datetime import timedelta
 from utils.logger import setup_logger, get_logger
+from utils.access_log_writer import access_log_writer
+from utils.json_provider import init_json_provider
 import os
+import threading
+import time
 
 # 初始化日志
 logger = setup_logger('app', log_file='app.log')
 
 app = Flask(__name__)
 
+# 部署在反向代理（Nginx）之后：由 ProxyFix 统一解析 X-Forwarded-For，request.remote_addr 即为客户端IP
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1)
+
+# 使用 orjson 序列化 JSON 响应
+init_json_provider(app)
+
 # 配置数据库
 app.config['SQLALCHEMY_DATABASE_URI'] = SQLALCHEMY_DATABASE_URI
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = SQLALCHEMY_ENGINE_OPTIONS
+# 连接池默认参数（config.py 中的同名配置优先）
+# 每个 worker 进程各自持有连接池，按进程数（WEB_WORKERS，由 gunicorn_conf.py / uwsgi.ini 设置）
+# 分摊 MySQL max_connections（MYSQL_MAX_CONNECTIONS，默认151），预留10个连接给管理和脚本
+_web_workers = max(1, int(os.environ.get('WEB_WORKERS', '1')))
+_mysql_max_connections = int(os.environ.get('MYSQL_MAX_CONNECTIONS', '151'))
+_conn_per_worker = max(2, (_mysql_max_connections - 10) // _web_workers)
+_pool_size = min(10, _conn_per_worker // 2)
+DEFAULT_ENGINE_OPTIONS = {
+    'pool_size': _pool_size,
+    'max_overflow': min(10, _conn_per_worker - _pool_size),
+    # gevent worker 中并发协程数（worker_connections）远大于连接池容量，取不到连接时尽快失败，不排队等待默认的30秒
+    'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', '5')),
+    'pool_pre_ping': True,  # 取连接前检测可用性，自动替换已断开的连接
+    'pool_recycle': 1800  # 30分钟回收连接，避免被MySQL wait_timeout断开
+}
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**DEFAULT_ENGINE_OPTIONS, **(SQLALCHEMY_ENGINE_OPTIONS or {})}
 app.config['SECRET_KEY'] = SECRET_KEY
 
 # Session安全配置
@@ -28,27 +55,72 @@ app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=7)  # Session有效期
 # 其他安全配置
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 限制请求体大小16MB
 
+# 静态文件发送：前端为 Apache/lighttpd 时可设置 USE_X_SENDFILE=1，由Web服务器直接发送文件
+# （Nginx 不识别 X-Sendfile，应直接用 location 托管 /static/，见 README）
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
+
 # 初始化数据库
 db.init_app(app)
 
+# 访问记录异步批量写入
+access_log_writer.init_app(app)
+
 # 注册所有路由
 register_routes(app)
 
 # 健康检查端点
+# 监控系统会高频探测该接口，数据库探测结果短时间缓存，避免每次探测都占用连接
+HEALTH_TTL = 3  # 健康状态缓存时间（秒）
+HEALTH_FAILURE_TTL = 1  # 失败状态最多缓存1秒，尽快重新探测
+_health_cache = {'ts': 0, 'status': None}
+_health_lock = threading.Lock()
+
+def _probe_database():
+    """ 探测数据库连接，结果按TTL缓存 """
+    now = time.monotonic()
+    status = _health_cache['status']
+    ttl = HEALTH_TTL if status == 'healthy' else HEALTH_FAILURE_TTL
+    if status is not None and now - _health_cache['ts'] < ttl:
+        return status
+
+    with _health_lock:
+        # 等锁期间可能已被其他线程刷新
+        status = _health_cache['status']
+        ttl = HEALTH_TTL if status == 'healthy' else HEALTH_FAILURE_TTL
+        if status is not None and time.monotonic() - _health_cache['ts'] < ttl:
+            return status
+
+        try:
+            # 直接使用连接执行探测，不经过session，也不开启ORM事务
+            with db.engine.connect() as conn:
+                conn.execute(text('SELECT 1')).scalar()
+            status = 'healthy'
+        except Exception as e:
+            logger.error(f"数据库健康检查失败: {e}")
+            status = 'unhealthy'
+        _health_cache['status'] = status
+        _health_cache['ts'] = time.monotonic()
+        return status
+
+@app.route('/livez')
+def liveness_check():
+    """ 存活检查：进程能响应即可，不访问数据库 """
+    return jsonify({'status': 'alive', 'timestamp': time.time()})
+
+@app.route('/readyz')
 @app.route('/health')
 def health_check():
-    """ 服务健康检查 """
-    import time
-    try:
-        # 检查数据库连接
-        db.session.execute('SELECT 1')
-        db_status = 'healthy'
-    except Exception as e:
-        logger.error(f"数据库健康检查失败: {e}")
-        db_status = 'unhealthy'
+    """ 就绪检查（服务健康检查）：带缓存的数据库探测，未就绪时返回503 """
+    db_status = _probe_database()
+    if db_status != 'healthy':
+        return jsonify({
+            'status': 'degraded',
+            'timestamp': time.time(),
+            'database': db_status
+        }), 503
     
     return jsonify({
-        'status': 'healthy' if db_status == 'healthy' else 'degraded',
+        'status': 'healthy',
         'timestamp': time.time(),
         'database': db_status
     })
@@ -93,7 +165,10 @@ PUBLIC_PATHS = {
     '/api/auth/api-key',
     '/admin',
     '/admin/login',
-    '/favicon.ico'
+    '/favicon.ico',
+    '/health',
+    '/livez',
+    '/readyz'
 }
 
 # 允许未登录访问的前缀
@@ -110,103 +185,76 @@ PUBLIC_PREFIXES = (
     '/results'
 )
 
+# 静态资源前缀：这些请求不做黑名单/手机限制/访问记录等任何数据库相关处理
+STATIC_PREFIXES = ('/static/', '/favicon.ico', '/sw.js', '/manifest')
+
+# 不记录访问日志的请求方法
+UNLOGGED_METHODS = frozenset(('HEAD', 'OPTIONS'))
+
+# 手机版限制的错误页面（纯静态内容，启动时读取一次，之后直接返回字节）
+with app.open_resource('templates/mobile_block.html', 'rb') as f:
+    MOBILE_BLOCKED_BODY = f.read()
+
+# 公开路径对应的端点名（首次请求时根据路由表计算一次）
+_PUBLIC_ENDPOINTS = None
+
+def _is_public_rule(rule):
+    """判断路由规则是否属于公开路径"""
+    return rule in PUBLIC_PATHS or rule.startswith(PUBLIC_PREFIXES) or rule == '/profile'
+
+def _get_public_endpoints():
+    """根据路由表构建公开端点集合，之后每个请求只需一次集合查找"""
+    global _PUBLIC_ENDPOINTS
+    if _PUBLIC_ENDPOINTS is None:
+        _PUBLIC_ENDPOINTS = frozenset(
+            rule.endpoint for rule in app.url_map.iter_rules()
+            if _is_public_rule(rule.rule)
+        )
+    return _PUBLIC_ENDPOINTS
+
 # IP黑名单检查中间件
 @app.before_request
 def before_request():
+    # 静态资源直接放行，不做任何数据库相关处理
+    path = request.path
+    if path.startswith(STATIC_PREFIXES):
+        return
+
     # 检查IP黑名单
     is_blacklisted, ip_address = check_ip_blacklist()
     if is_blacklisted:
         return {'error': 'Access denied'}, 403
     
-    # 检查手机版限制
-    try:
-        mobile_only_enabled = AppConfig.get_config('mobile_only_access', False)
-        is_blocked, error_message = check_mobile_only_access(mobile_only_enabled)
-        if is_blocked:
-            # 返回友好的错误页面
-            error_html = """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>访问受限</title>
-                <style>
-                    body {
-                        font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-                        display: flex;
-                        justify-content: center;
-                        align-items: center;
-                        min-height: 100vh;
-                        margin: 0;
-                        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                        color: #333;
-                    }
-                    .container {
-                        background: white;
-                        padding: 40px;
-                        border-radius: 20px;
-                        box-shadow: 0 10px 40px rgba(0,0,0,0.2);
-                        text-align: center;
-                        max-width: 500px;
-                        margin: 20px;
-                    }
-                    .icon {
-                        font-size: 80px;
-                        margin-bottom: 20px;
-                    }
-                    h1 {
-                        margin: 0 0 20px 0;
-                        color: #333;
-                    }
-                    p {
-                        color: #666;
-                        line-height: 1.6;
-                        margin: 0 0 30px 0;
-                    }
-                    .note {
-                        background: #f5f5f5;
-                        padding: 15px;
-                        border-radius: 10px;
-                        margin-top: 20px;
-                        font-size: 14px;
-                        color: #888;
-                    }
-                </style>
-            </head>
-            <body>
-                <div class="container">
-                    <div class="icon">📱</div>
-                    <h1>仅支持手机访问</h1>
-                    <p>抱歉，当前网站仅支持手机设备访问，请使用手机浏览器打开。</p>
-                    <div class="note">
-                        如果您使用的是手机浏览器但仍然看到此提示，请联系管理员。
-                    </div>
-                </div>
-            </body>
-            </html>
-            """
-            return render_template_string(error_html), 403
-    except Exception:
-        # 如果检查失败，不影响正常访问
-        pass
+    # 检查手机版限制（后台管理页面不受限制，无需读取配置）
+    if request.blueprint != 'admin':
+        try:
+            mobile_only_enabled = AppConfig.get_config('mobile_only_access', False)
+            is_blocked, error_message = check_mobile_only_access(mobile_only_enabled)
+            if is_blocked:
+                # 返回友好的错误页面
+                return app.response_class(MOBILE_BLOCKED_BODY, status=403, mimetype='text/html')
+        except Exception:
+            # 如果检查失败，不影响正常访问
+            pass
     
-    # 记录IP访问（异步，不阻塞请求）
-    try:
-        log_ip_access()
-    except:
-        pass  # 记录失败不影响正常请求
+    # 记录IP访问（放入队列异步写入，不阻塞请求）
+    if request.method not in UNLOGGED_METHODS:
+        try:
+            log_ip_access()
+        except:
+            pass  # 记录失败不影响正常请求
 
     # 登录校验：除公开路径外，访问网站必须已登录
-    path = request.path
     if request.method == 'OPTIONS':
         return
 
-    if path in PUBLIC_PATHS or path.startswith(PUBLIC_PREFIXES):
-        return
-
-    # 个人中心页用于登录/注册，不拦截
-    if path == '/profile':
+    # 个人中心页用于登录/注册，不拦截（已包含在公开端点中）
+    endpoint = request.endpoint
+    if endpoint is not None:
+        if endpoint in _get_public_endpoints():
+            return
+    elif _is_public_rule(path):
+        # 未匹配到路由时按原始路径判断（交给404处理）
         return
 
     if session.get('user_id'):
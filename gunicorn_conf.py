@@ -1,17 +1,25 @@
+import multiprocessing
+import os
+
 # 项目目录
 chdir = '/path/to/your/project'
 
 # 指定进程数
-workers = 4
-
-# 指定每个进程开启的线程数
-threads = 2
+workers = int(os.environ.get('WEB_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+# 传给应用，按进程数分摊数据库连接池大小（见 app.py）
+os.environ['WEB_WORKERS'] = str(workers)
 
 #启动用户
 user = 'your_username'
 
-# 启动模式
-worker_class = 'uvicorn.workers.UvicornWorker'
+# 启动模式（Flask 是 WSGI 应用，使用 gevent 协程处理并发，需要 pip install gevent）
+# gevent worker 会在加载应用前自动 monkey patch，pymysql/requests 的网络IO不会阻塞整个进程
+worker_class = 'gevent'
+
+# 每个进程的最大并发连接数（仅 gevent 等异步 worker 生效）
+# 这些协程共用本进程的数据库连接池（按进程数分摊，见 app.py），同时查库的请求超过连接池容量时
+# 会在 DB_POOL_TIMEOUT 秒后失败；数据库请求占比高时应调小该值或增大 MYSQL_MAX_CONNECTIONS
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', 1000))
 
 # 绑定的ip与端口
 bind = '0.0.0.0:8000' 
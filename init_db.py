@@ -58,6 +58,68 @@ def create_database_if_not_exists():
         print(f"✗ 连接MySQL服务器失败: {e}")
         return False
 
+# 已从模型中移除的索引，升级已有数据库时删除
+OBSOLETE_INDEXES = {
+    # 单列 access_time 索引已被 ix_ipaccess_time_ip 覆盖（access_time 为前导列）
+    'ip_access_log': ['ix_ip_access_log_access_time'],
+}
+
+def ensure_indexes():
+    """
+    为已存在的表补建模型中新增的索引，并删除 OBSOLETE_INDEXES 中的旧索引
+    db.create_all() 只会创建不存在的表，不会给已有的表添加索引
+    """
+    inspector = db.inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_indexes = {idx['name'] for idx in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind=db.engine)
+                created.append(f"{table.name}.{index.name}")
+        for index_name in OBSOLETE_INDEXES.get(table.name, []):
+            if index_name in existing_indexes:
+                with db.engine.begin() as conn:
+                    conn.execute(db.text(f"DROP INDEX `{index_name}` ON `{table.name}`"))
+    return created
+
+def ensure_json_columns():
+    """
+    将模型中声明为JSON类型、但数据库中仍为TEXT的列转换为MySQL原生JSON类型
+    （如 interface_definition.field_mapping）
+    """
+    inspector = db.inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    converted = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        json_columns = [col for col in table.columns if isinstance(col.type, db.JSON)]
+        if not json_columns:
+            continue
+        db_columns = {col['name']: col for col in inspector.get_columns(table.name)}
+        for column in json_columns:
+            db_column = db_columns.get(column.name)
+            if db_column is None or isinstance(db_column['type'], db.JSON):
+                continue
+            with db.engine.begin() as conn:
+                # 空串或非法JSON会导致 MODIFY 失败，先列出这些行并置为NULL
+                pk = ', '.join(f"`{c.name}`" for c in table.primary_key.columns) or 'NULL'
+                invalid_filter = f"`{column.name}` = '' OR JSON_VALID(`{column.name}`) = 0"
+                bad_rows = conn.execute(db.text(
+                    f"SELECT {pk} FROM `{table.name}` WHERE {invalid_filter}"
+                )).fetchall()
+                if bad_rows:
+                    ids = ', '.join(str(row[0] if len(row) == 1 else tuple(row)) for row in bad_rows)
+                    print(f"  ! {table.name}.{column.name} 有 {len(bad_rows)} 行不是合法JSON，已置为NULL: {ids}")
+                    conn.execute(db.text(f"UPDATE `{table.name}` SET `{column.name}` = NULL WHERE {invalid_filter}"))
+                conn.execute(db.text(f"ALTER TABLE `{table.name}` MODIFY `{column.name}` JSON"))
+            converted.append(f"{table.name}.{column.name}")
+    return converted
+
 def init_database():
     """初始化数据库"""
     print("=" * 60)
@@ -90,6 +152,19 @@ def init_database():
             print("\n正在创建数据表...")
             db.create_all()
             
+            # 补建已有表缺少的索引
+            print("\n正在检查索引...")
+            created_indexes = ensure_indexes()
+            if created_indexes:
+                for name in created_indexes:
+                    print(f"  ✓ 新建索引 {name}")
+            else:
+                print("✓ 索引已是最新")
+            
+            # 转换JSON列类型
+            for name in ensure_json_columns():
+                print(f"  ✓ 列 {name} 已转换为JSON类型")
+            
             # 检查表是否创建成功
             print("\n正在验证表创建...")
             inspector = db.inspect(db.engine)
@@ -2,52 +2,105 @@
 IP访问记录中间件
 """
 from flask import request
-from models.database import db, IPAccessLog, IPBlacklist
+from sqlalchemy import select, literal, null, union_all
+from models.database import db, IPBlacklist, AppConfig, IPAccessLog
 from datetime import datetime
+import threading
+import time
+from utils.access_log_writer import access_log_writer
+from utils.client_ip import get_client_ip
+
+# 截断长度取自列定义（VARCHAR长度），避免与表结构不一致
+USER_AGENT_MAX_LENGTH = IPAccessLog.__table__.c.user_agent.type.length
+REQUEST_PATH_MAX_LENGTH = IPAccessLog.__table__.c.request_path.type.length
+
+
+class BlacklistCache:
+    """IP黑名单进程内缓存（黑名单很小且很少变化，定期整体刷新）"""
+
+    TTL = 60  # 缓存有效期（秒）
+    # 每个请求都会读取的配置项，刷新黑名单时一并加载，预热 AppConfig 缓存
+    PRELOAD_CONFIG_KEYS = ('mobile_only_access',)
+
+    _ips = frozenset()
+    _ts = 0.0
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls):
+        """获取黑名单IP集合，过期时从数据库重新加载"""
+        if time.monotonic() - cls._ts < cls.TTL:
+            return cls._ips
+        with cls._lock:
+            if time.monotonic() - cls._ts < cls.TTL:
+                return cls._ips
+            ips, configs = cls._load()
+            cls._ips = frozenset(ips)
+            cls._ts = time.monotonic()
+            for key in cls.PRELOAD_CONFIG_KEYS:
+                AppConfig.cache_config(key, configs.get(key))
+            return cls._ips
+
+    @classmethod
+    def _load(cls):
+        """一次查询（UNION ALL）同时取出黑名单和常用配置，只需一次数据库往返"""
+        stmt = union_all(
+            select(
+                literal('bl').label('kind'),
+                IPBlacklist.ip_address.label('name'),
+                null().label('value')
+            ),
+            select(
+                literal('cfg'),
+                AppConfig.config_key,
+                AppConfig.config_value
+            ).where(AppConfig.config_key.in_(cls.PRELOAD_CONFIG_KEYS))
+        )
+        ips = []
+        configs = {}
+        for kind, name, value in db.session.execute(stmt):
+            if kind == 'bl':
+                ips.append(name)
+            else:
+                configs[name] = value
+        return ips, configs
+
+    @classmethod
+    def invalidate(cls):
+        """使缓存失效（黑名单变更后调用）"""
+        cls._ts = 0.0
+
 
 def check_ip_blacklist():
     """检查IP是否在黑名单中"""
-    ip_address = request.remote_addr
-    # 检查X-Forwarded-For头（如果使用代理）
-    if request.headers.get('X-Forwarded-For'):
-        ip_address = request.headers.get('X-Forwarded-For').split(',')[0].strip()
+    ip_address = get_client_ip()
     
     # 检查黑名单
-    blacklisted = IPBlacklist.query.filter_by(ip_address=ip_address).first()
-    if blacklisted:
-        return True, ip_address
-    return False, ip_address
+    return ip_address in BlacklistCache.get(), ip_address
 
 def log_ip_access():
-    """记录IP访问"""
+    """记录IP访问（放入队列，由后台线程批量写入）"""
     try:
-        ip_address = request.remote_addr
-        # 检查X-Forwarded-For头（如果使用代理）
-        if request.headers.get('X-Forwarded-For'):
-            ip_address = request.headers.get('X-Forwarded-For').split(',')[0].strip()
+        ip_address = get_client_ip()
         
         # 跳过后台管理页面的访问记录（避免管理员操作产生大量日志）
         if request.path.startswith('/admin'):
             return
         
-        # 记录访问
-        log_entry = IPAccessLog(
-            ip_address=ip_address,
-            user_agent=request.headers.get('User-Agent', '')[:500],
-            request_path=request.path[:500],
-            request_method=request.method,
-            access_time=datetime.utcnow()
-        )
-        
-        db.session.add(log_entry)
-        db.session.commit()
+        # 记录访问（只有超长时才截断，常见的短字符串原样入队）
+        user_agent = request.headers.get('User-Agent', '')
+        if len(user_agent) > USER_AGENT_MAX_LENGTH:
+            user_agent = user_agent[:USER_AGENT_MAX_LENGTH]
+        request_path = request.path
+        if len(request_path) > REQUEST_PATH_MAX_LENGTH:
+            request_path = request_path[:REQUEST_PATH_MAX_LENGTH]
+        access_log_writer.put({
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'request_path': request_path,
+            'request_method': request.method,
+            'access_time': datetime.utcnow()
+        })
     except Exception:
         # 记录失败不影响正常请求
-        try:
-            db.session.rollback()
-        except:
-            pass
-
-
-
-
+        pass
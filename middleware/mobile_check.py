@@ -4,46 +4,33 @@
 from flask import request
 import re
 
+# 手机设备关键词（已去重；被其他关键词包含的项如 'iemobile'、'opera mini'、'avantgo' 不再单独列出）
+MOBILE_KEYWORDS = frozenset({
+    'mobile', 'android', 'iphone', 'ipod', 'ipad',
+    'blackberry', 'windows phone', 'kindle', 'silk', 'fennec',
+    'maemo', 'bada', 'nokia', 'lg', 'ucweb',
+    'skyfire', 'bolt', 'teashark', 'blazer',
+    'mini', 'mmp', 'windows ce', 'smartphone',
+    'palm', 'netfront', 'semc-browser', 'opera mobi',
+    'symbian', 'webos', 'pda', 'avantg',
+    'plucker', 'xiino', 'risc os', 'teleca'
+})
+
+# 关键词无法覆盖的User-Agent模式（其余模式如 android.*mobile、iphone 已被关键词覆盖）
+MOBILE_PATTERNS = (
+    r'windows\s+phone',
+)
+
+# 关键词和模式合并为一个正则，导入时编译一次，每个请求只扫描一遍User-Agent
+_MOBILE_RE = re.compile(
+    '|'.join([re.escape(keyword) for keyword in sorted(MOBILE_KEYWORDS)] + list(MOBILE_PATTERNS)),
+    re.IGNORECASE
+)
+
 def is_mobile_device():
     """检测是否为手机设备"""
-    user_agent = request.headers.get('User-Agent', '').lower()
-    
-    # 手机设备关键词
-    mobile_keywords = [
-        'mobile', 'android', 'iphone', 'ipod', 'ipad', 
-        'blackberry', 'windows phone', 'opera mini', 
-        'iemobile', 'kindle', 'silk', 'fennec', 
-        'maemo', 'bada', 'nokia', 'lg', 'ucweb',
-        'skyfire', 'bolt', 'teashark', 'blazer',
-        'mini', 'mmp', 'windows ce', 'smartphone',
-        'palm', 'netfront', 'semc-browser', 'opera mobi',
-        'symbian', 'webos', 'pda', 'avantgo', 'avantg',
-        'plucker', 'xiino', 'risc os', 'teleca', 'opera mini'
-    ]
-    
-    # 检查是否包含手机关键词
-    for keyword in mobile_keywords:
-        if keyword in user_agent:
-            return True
-    
-    # 检查移动设备的常见屏幕尺寸（通过User-Agent中的信息判断）
-    mobile_patterns = [
-        r'android.*mobile',
-        r'iphone',
-        r'ipod',
-        r'ipad',
-        r'windows\s+phone',
-        r'blackberry',
-        r'opera\s+mini',
-        r'iemobile',
-        r'mobile.*firefox'
-    ]
-    
-    for pattern in mobile_patterns:
-        if re.search(pattern, user_agent, re.IGNORECASE):
-            return True
-    
-    return False
+    user_agent = request.headers.get('User-Agent', '')
+    return _MOBILE_RE.search(user_agent) is not None
 
 def check_mobile_only_access(enabled):
     """
@@ -1,8 +1,15 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+import time
 
 db = SQLAlchemy()
 
+# AppConfig 读取缓存：{config_key: (缓存时间, 原始配置值)}
+_cfg_cache = {}
+_CFG_TTL = 30  # 配置缓存有效期（秒）
+_TRUTHY = frozenset(('true', '1', 'yes', 'on'))
+_FALSY = frozenset(('false', '0', 'no', 'off'))
+
 class User(db.Model):
     """用户表"""
     __tablename__ = 'users'
@@ -10,7 +17,7 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
     password = db.Column(db.String(255), nullable=False)
-    register_time = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    register_time = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     
     # 关联关系
     bookshelf_items = db.relationship('Bookshelf', backref='user', lazy=True, cascade='all, delete-orphan')
@@ -65,6 +72,13 @@ class PlayHistory(db.Model):
     book_anchor = db.Column(db.String(200))
     play_time = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     
+    # 复合索引：按用户查询最近播放记录（ORDER BY play_time 可直接走索引）
+    # 以及按用户+书籍分组取最新播放时间（GROUP BY + MAX 可只扫描索引）
+    __table_args__ = (
+        db.Index('ix_playhistory_user_time', 'user_id', 'play_time'),
+        db.Index('ix_playhistory_user_book_time', 'user_id', 'book_id', 'interface', 'play_time'),
+    )
+    
     def to_dict(self):
         try:
             return {
@@ -127,7 +141,10 @@ class IPAccessLog(db.Model):
     user_agent = db.Column(db.String(500))
     request_path = db.Column(db.String(500))
     request_method = db.Column(db.String(10))
-    access_time = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    access_time = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # 复合索引：后台统计按时间范围过滤并按IP分组/去重，可只扫描索引
+    __table_args__ = (db.Index('ix_ipaccess_time_ip', 'access_time', 'ip_address'),)
     
     def to_dict(self):
         return {
@@ -169,6 +186,9 @@ class Announcement(db.Model):
     create_time = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     update_time = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # 启用公告查询（按更新时间取最新）与停用其他公告都按 is_active 过滤
+    __table_args__ = (db.Index('ix_announcement_active_update', 'is_active', 'update_time'),)
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -186,7 +206,7 @@ class IPAnnouncementConfirm(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     ip_address = db.Column(db.String(50), nullable=False, index=True)
     announcement_id = db.Column(db.Integer, db.ForeignKey('announcement.id', ondelete='CASCADE'), nullable=False, index=True)
-    confirm_time = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    confirm_time = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     
     # 唯一约束：同一IP对同一公告只能确认一次
     __table_args__ = (db.UniqueConstraint('ip_address', 'announcement_id', name='unique_ip_announcement'),)
@@ -214,6 +234,9 @@ class Feedback(db.Model):
     process_by = db.Column(db.String(80))  # 处理人（管理员用户名）
     remark = db.Column(db.Text)  # 备注
     
+    # 复合索引：按状态统计/筛选并按时间排序
+    __table_args__ = (db.Index('ix_feedback_status_create', 'status', 'create_time'),)
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -249,21 +272,40 @@ class AppConfig(db.Model):
     
     @staticmethod
     def get_config(key, default_value=None):
-        """获取配置值"""
+        """获取配置值（进程内缓存 _CFG_TTL 秒）"""
         try:
-            config = AppConfig.query.filter_by(config_key=key).first()
-            if config and config.config_value:
+            cached = _cfg_cache.get(key)
+            now = time.monotonic()
+            if cached is not None and now - cached[0] < _CFG_TTL:
+                raw_value = cached[1]
+            else:
+                config = AppConfig.query.filter_by(config_key=key).first()
+                raw_value = config.config_value if config else None
+                _cfg_cache[key] = (now, raw_value)
+
+            if raw_value:
                 # 尝试解析为布尔值
-                config_value = str(config.config_value).lower()
-                if config_value in ('true', '1', 'yes', 'on'):
+                config_value = str(raw_value).lower()
+                if config_value in _TRUTHY:
                     return True
-                elif config_value in ('false', '0', 'no', 'off'):
+                elif config_value in _FALSY:
                     return False
-                return config.config_value
+                return raw_value
             return default_value
         except Exception:
             return default_value
     
+    @staticmethod
+    def cache_config(key, raw_value):
+        """写入配置缓存（用于与其他查询合并加载配置时预热缓存）"""
+        _cfg_cache[key] = (time.monotonic(), raw_value)
+    
+    @staticmethod
+    def invalidate_config(*keys):
+        """使指定配置的进程内缓存失效（下次读取时重新查库）"""
+        for key in keys:
+            _cfg_cache.pop(key, None)
+    
     @staticmethod
     def set_config(key, value, description=None):
         """设置配置值"""
@@ -282,6 +324,7 @@ class AppConfig(db.Model):
                 )
                 db.session.add(config)
             db.session.commit()
+            _cfg_cache.pop(key, None)
             return True
         except Exception as e:
             db.session.rollback()
@@ -297,29 +340,18 @@ class InterfaceDefinition(db.Model):
     display_name = db.Column(db.String(100), nullable=False)  # 显示名称
     description = db.Column(db.Text)  # 接口描述
     enabled = db.Column(db.Boolean, default=True, nullable=False)  # 是否启用
-    field_mapping = db.Column(db.Text)  # 字段映射配置（JSON字符串）
+    field_mapping = db.Column(db.JSON(none_as_null=True))  # 字段映射配置（MySQL原生JSON类型，读取时已是dict）
     create_time = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     update_time = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self):
-        import json
-        field_mapping_dict = None
-        if self.field_mapping:
-            try:
-                field_mapping_dict = json.loads(self.field_mapping)
-            except:
-                pass
-        
         return {
             'id': self.id,
             'interface_name': self.interface_name,
             'display_name': self.display_name,
             'description': self.description,
             'enabled': self.enabled,
-            'field_mapping': field_mapping_dict,
+            'field_mapping': self.field_mapping,
             'create_time': self.create_time.isoformat() if self.create_time else None,
             'update_time': self.update_time.isoformat() if self.update_time else None
         }
-
-
-
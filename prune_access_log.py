@@ -0,0 +1,42 @@
+"""
+IP访问记录清理脚本
+删除超过保留期的 ip_access_log 记录
+
+使用方法：
+    python prune_access_log.py          # 保留最近30天
+    python prune_access_log.py 7        # 保留最近7天
+
+建议用 cron 每天低峰期执行一次，例如：
+    30 4 * * * cd /path/to/your/project && python prune_access_log.py
+"""
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete
+from app import app
+from models.database import db, IPAccessLog
+
+RETENTION_DAYS = 30  # 访问记录保留天数
+PRUNE_BATCH_SIZE = 10000  # 每次DELETE最多删除的行数，避免长时间锁表
+
+def prune_access_log(retention_days=RETENTION_DAYS, batch_size=PRUNE_BATCH_SIZE):
+    """分批删除超过保留期的访问记录，返回删除的行数"""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    # 先按 access_time 索引取一批id再按主键删除，不依赖 MySQL 专有的 DELETE ... LIMIT
+    batch_ids = select(IPAccessLog.id).where(IPAccessLog.access_time < cutoff).limit(batch_size)
+    deleted = 0
+    while True:
+        with db.engine.begin() as conn:
+            ids = conn.execute(batch_ids).scalars().all()
+            if not ids:
+                break
+            conn.execute(delete(IPAccessLog).where(IPAccessLog.id.in_(ids)))
+        deleted += len(ids)
+        if len(ids) < batch_size:
+            break
+    return deleted
+
+if __name__ == '__main__':
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else RETENTION_DAYS
+    with app.app_context():
+        count = prune_access_log(days)
+    print(f"已清理 {count} 条超过 {days} 天的访问记录")
@@ -1,19 +1,44 @@
 """
 后台管理路由
 """
-from flask import Blueprint, request, jsonify, session, render_template
+from flask import Blueprint, request, jsonify, session, render_template, current_app, Response
 from models.database import db, User, APIConfig, IPAccessLog, IPBlacklist, Announcement, IPAnnouncementConfirm, Feedback, AppConfig, InterfaceDefinition
-from werkzeug.security import check_password_hash
+from utils.pwhash import hash_password, verify_password
 from datetime import datetime, timedelta
-from sqlalchemy import func, distinct
+from sqlalchemy import func, distinct, select, case, true, delete
+from sqlalchemy.orm import load_only
+from middleware.ip_logger import BlacklistCache
+from utils.rate_limiter import strict_rate_limit
+from utils.interface_registry import registry
+from utils.interface_cache import invalidate_enabled_interfaces
+from utils.logger import get_logger
 from functools import wraps
-import json
+import time
 
 admin_bp = Blueprint('admin', __name__)
+logger = get_logger('admin')
+
+# 管理员登录有效期：签名session在有效期内直接放行，不再查库或校验密码
+ADMIN_SESSION_MAX_AGE = 4 * 3600  # 秒
+
+# 超级管理员ID缓存（第一个用户创建后不会变化，且不允许删除）
+_admin_user_id = None
 
 def get_admin_user():
-    """获取超级管理员（数据库第一个用户）"""
-    return User.query.order_by(User.id.asc()).first()
+    """获取超级管理员（数据库第一个用户），顺便填充管理员ID缓存"""
+    global _admin_user_id
+    admin_user = User.query.order_by(User.id.asc()).first()
+    if admin_user is not None:
+        _admin_user_id = admin_user.id
+    return admin_user
+
+def get_admin_user_id():
+    """获取超级管理员ID（只查询一次id列，之后使用进程内缓存）"""
+    global _admin_user_id
+    if _admin_user_id is None:
+        # 尚无用户时不缓存，第一个用户注册后即可生效
+        _admin_user_id = db.session.query(User.id).order_by(User.id.asc()).limit(1).scalar()
+    return _admin_user_id
 
 def admin_required(f):
     """管理员权限装饰器"""
@@ -24,20 +49,81 @@ def admin_required(f):
         if not user_id:
             return jsonify({'error': '请先登录'}), 401
         
+        # 检查登录是否过期
+        auth_ts = session.get('admin_auth_ts')
+        if not auth_ts or time.time() - auth_ts > ADMIN_SESSION_MAX_AGE:
+            session.pop('admin_user_id', None)
+            session.pop('admin_username', None)
+            session.pop('admin_auth_ts', None)
+            return jsonify({'error': '登录已过期，请重新登录'}), 401
+        
         # 检查是否是超级管理员（第一个用户）
-        admin_user = get_admin_user()
-        if not admin_user or user_id != admin_user.id:
+        if user_id != get_admin_user_id():
             return jsonify({'error': '权限不足'}), 403
         
         return f(*args, **kwargs)
     return decorated_function
 
+# 统计接口响应缓存：{缓存键: (缓存时间, 响应内容)}
+# 后台面板会定时轮询统计接口，而统计数字按分钟级变化，短时间缓存即可避免重复查询
+STATS_CACHE_TTL = 15  # 秒
+ADMIN_MAX_PER_PAGE = 100  # 管理端列表每页最大条数
+_stats_cache = {}
+
+def cached_stats(key):
+    """统计接口响应缓存装饰器（只缓存成功的JSON响应）"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            now = time.monotonic()
+            cached = _stats_cache.get(key)
+            if cached is not None and now - cached[0] < STATS_CACHE_TTL:
+                return current_app.response_class(cached[1], mimetype='application/json')
+            
+            response = f(*args, **kwargs)
+            if isinstance(response, Response) and response.status_code == 200:
+                _stats_cache[key] = (now, response.get_data())
+            return response
+        return decorated_function
+    return decorator
+
+def invalidate_stats_cache():
+    """数据变更后清空统计缓存"""
+    _stats_cache.clear()
+
+def paginate_rows(stmt, page, per_page):
+    """对Core查询分页，返回 (行列表, 分页信息)；page/per_page 按 1..ADMIN_MAX_PER_PAGE 修正"""
+    page = max(page, 1)
+    per_page = min(max(per_page, 1), ADMIN_MAX_PER_PAGE)
+    total = db.session.execute(
+        select(func.count()).select_from(stmt.order_by(None).subquery())
+    ).scalar()
+    rows = db.session.execute(stmt.limit(per_page).offset((page - 1) * per_page)).all()
+    return rows, {
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': (total + per_page - 1) // per_page
+    }
+
+def rows_to_dicts(rows):
+    """将Core查询结果行直接转换为dict（datetime转为ISO格式，与模型to_dict输出一致）"""
+    result = []
+    for row in rows:
+        item = dict(row._mapping)
+        for key, value in item.items():
+            if isinstance(value, datetime):
+                item[key] = value.isoformat()
+        result.append(item)
+    return result
+
 @admin_bp.route('/admin')
 def admin_login_page():
     """后台登录页面"""
     return render_template('admin/login.html')
 
 @admin_bp.route('/admin/login', methods=['POST'])
+@strict_rate_limit  # 密码哈希校验开销较大，限制尝试频率
 def admin_login():
     """后台登录"""
     try:
@@ -57,12 +143,13 @@ def admin_login():
         if admin_user.username != username:
             return jsonify({'error': '用户名或密码错误'}), 401
         
-        if not check_password_hash(admin_user.password, password):
+        if not verify_password(admin_user.password, password):
             return jsonify({'error': '用户名或密码错误'}), 401
         
         # 设置管理员session
         session['admin_user_id'] = admin_user.id
         session['admin_username'] = admin_user.username
+        session['admin_auth_ts'] = time.time()
         
         return jsonify({
             'success': True,
@@ -79,6 +166,7 @@ def admin_logout():
     """后台退出"""
     session.pop('admin_user_id', None)
     session.pop('admin_username', None)
+    session.pop('admin_auth_ts', None)
     return jsonify({'success': True, 'message': '已退出登录'})
 
 @admin_bp.route('/admin/dashboard')
@@ -89,18 +177,35 @@ def admin_dashboard():
 
 @admin_bp.route('/admin/api/stats', methods=['GET'])
 @admin_required
+@cached_stats('admin_stats')
 def admin_stats():
     """获取统计信息"""
     try:
-        # 注册人数
-        total_users = User.query.count()
-        
-        # 今日注册人数
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        today_users = User.query.filter(User.register_time >= today_start).count()
+        now = datetime.utcnow()
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        seven_days_ago = now - timedelta(days=7)
+        
+        # 用户、访问、黑名单统计合并为一条SQL（条件聚合 + 标量子查询），只需一次数据库往返
+        user_stats = select(
+            func.count(User.id),
+            func.count(case((User.register_time >= today_start, User.id)))
+        )
+        # 今日访问IP数 / 总访问次数（最近7天）：只扫描一遍最近7天的访问记录
+        access_stats = select(
+            func.count(distinct(case((IPAccessLog.access_time >= today_start, IPAccessLog.ip_address)))),
+            func.count(IPAccessLog.id)
+        ).where(IPAccessLog.access_time >= seven_days_ago)
+        user_row = user_stats.subquery()
+        access_row = access_stats.subquery()
+        (total_users, today_users, today_ip_count, total_access, blacklist_count) = db.session.execute(
+            select(
+                *user_row.c,
+                *access_row.c,
+                select(func.count(IPBlacklist.id)).scalar_subquery()
+            ).select_from(user_row.join(access_row, true()))
+        ).one()
         
         # IP访问统计（最近7天）
-        seven_days_ago = datetime.utcnow() - timedelta(days=7)
         ip_stats = db.session.query(
             IPAccessLog.ip_address,
             func.count(IPAccessLog.id).label('count')
@@ -111,18 +216,6 @@ def admin_stats():
         
         ip_list = [{'ip': item.ip_address, 'count': item.count} for item in ip_stats]
         
-        # 今日访问IP数
-        today_ip_count = db.session.query(
-            func.count(distinct(IPAccessLog.ip_address))
-        ).filter(IPAccessLog.access_time >= today_start).scalar() or 0
-        
-        # 总访问次数（最近7天）
-        total_access = db.session.query(func.count(IPAccessLog.id))\
-            .filter(IPAccessLog.access_time >= seven_days_ago).scalar() or 0
-        
-        # 黑名单数量
-        blacklist_count = IPBlacklist.query.count()
-        
         return jsonify({
             'success': True,
             'stats': {
@@ -143,16 +236,20 @@ def admin_stats():
 def admin_list_users():
     """获取用户列表"""
     try:
-        users = User.query.order_by(User.id.asc()).all()
-        admin_user = get_admin_user()
-        admin_id = admin_user.id if admin_user else None
+        # 只查询需要的列，不加载密码哈希、不构建ORM对象；序列化由全局orjson provider完成
+        rows = db.session.execute(
+            select(User.id, User.username, User.register_time).order_by(User.id.asc())
+        ).all()
+        admin_id = get_admin_user_id()
         return jsonify({
             'success': True,
             'users': [
                 {
-                    **u.to_dict(),
-                    'is_admin': (u.id == admin_id)
-                } for u in users
+                    'id': row.id,
+                    'username': row.username,
+                    'register_time': row.register_time.isoformat() if row.register_time else None,
+                    'is_admin': (row.id == admin_id)
+                } for row in rows
             ]
         })
     except Exception:
@@ -174,18 +271,19 @@ def admin_create_user():
             return jsonify({'error': '密码长度至少6位'}), 400
 
         # 检查是否已存在
-        existing = User.query.filter_by(username=username).first()
+        # 只做存在性判断，EXISTS 命中即停，不加载整行
+        existing = db.session.query(User.query.filter_by(username=username).exists()).scalar()
         if existing:
             return jsonify({'error': '该用户名已存在'}), 400
 
-        from werkzeug.security import generate_password_hash
         new_user = User(
             username=username,
-            password=generate_password_hash(password),
+            password=hash_password(password),
             register_time=datetime.utcnow()
         )
         db.session.add(new_user)
         db.session.commit()
+        invalidate_stats_cache()
 
         return jsonify({
             'success': True,
@@ -202,16 +300,17 @@ def admin_create_user():
 def admin_delete_user(user_id):
     """后台删除用户（不能删除第一个超级管理员）"""
     try:
-        admin_user = get_admin_user()
-        if admin_user and user_id == admin_user.id:
+        if user_id == get_admin_user_id():
             return jsonify({'error': '不能删除超级管理员账户'}), 400
 
-        user = User.query.get(user_id)
-        if not user:
+        # 单条DELETE按影响行数判断是否存在（书架/历史由外键 ON DELETE CASCADE 清理）
+        deleted = db.session.execute(delete(User).where(User.id == user_id)).rowcount
+        if not deleted:
+            db.session.rollback()
             return jsonify({'error': '用户不存在'}), 404
 
-        db.session.delete(user)
         db.session.commit()
+        invalidate_stats_cache()
 
         return jsonify({
             'success': True,
@@ -226,10 +325,18 @@ def admin_delete_user(user_id):
 def get_ip_blacklist():
     """获取IP黑名单列表"""
     try:
-        blacklist = IPBlacklist.query.order_by(IPBlacklist.create_time.desc()).all()
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 50, type=int)
+        
+        # 分页，避免一次性加载整张黑名单表；按列查询返回行元组，不构建ORM对象
+        rows, pagination = paginate_rows(
+            select(*IPBlacklist.__table__.c).order_by(IPBlacklist.create_time.desc()), page, per_page
+        )
+        
         return jsonify({
             'success': True,
-            'blacklist': [item.to_dict() for item in blacklist]
+            'blacklist': rows_to_dicts(rows),
+            'pagination': pagination
         })
     except Exception:
         return jsonify({'error': '获取IP黑名单失败'}), 500
@@ -247,7 +354,7 @@ def add_ip_blacklist():
             return jsonify({'error': 'IP地址不能为空'}), 400
         
         # 检查是否已存在
-        existing = IPBlacklist.query.filter_by(ip_address=ip_address).first()
+        existing = db.session.query(IPBlacklist.query.filter_by(ip_address=ip_address).exists()).scalar()
         if existing:
             return jsonify({'error': '该IP已在黑名单中'}), 400
         
@@ -261,6 +368,8 @@ def add_ip_blacklist():
         
         db.session.add(blacklist_item)
         db.session.commit()
+        invalidate_stats_cache()
+        BlacklistCache.invalidate()
         
         return jsonify({
             'success': True,
@@ -276,12 +385,14 @@ def add_ip_blacklist():
 def remove_ip_blacklist(item_id):
     """从黑名单移除IP"""
     try:
-        item = IPBlacklist.query.get(item_id)
-        if not item:
+        deleted = db.session.execute(delete(IPBlacklist).where(IPBlacklist.id == item_id)).rowcount
+        if not deleted:
+            db.session.rollback()
             return jsonify({'error': '黑名单项不存在'}), 404
         
-        db.session.delete(item)
         db.session.commit()
+        invalidate_stats_cache()
+        BlacklistCache.invalidate()
         
         return jsonify({
             'success': True,
@@ -303,8 +414,7 @@ def get_interface_definitions():
             'definitions': [defn.to_dict() for defn in definitions]
         })
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception('获取接口定义失败')
         return jsonify({'error': f'获取接口定义失败: {str(e)}'}), 500
 
 @admin_bp.route('/admin/api/interface-definitions', methods=['POST'])
@@ -323,9 +433,14 @@ def create_interface_definition():
             return jsonify({'error': '接口名称不能为空'}), 400
         if not display_name:
             return jsonify({'error': '显示名称不能为空'}), 400
+        # 写入时校验一次，读取时即可直接当dict使用
+        if field_mapping and not isinstance(field_mapping, dict):
+            return jsonify({'error': '字段映射必须是JSON对象'}), 400
         
         # 检查接口名称是否已存在
-        existing = InterfaceDefinition.query.filter_by(interface_name=interface_name).first()
+        existing = db.session.query(
+            InterfaceDefinition.query.filter_by(interface_name=interface_name).exists()
+        ).scalar()
         if existing:
             return jsonify({'error': f'接口名称 {interface_name} 已存在'}), 400
         
@@ -335,14 +450,14 @@ def create_interface_definition():
             display_name=display_name,
             description=description,
             enabled=enabled,
-            field_mapping=json.dumps(field_mapping) if field_mapping else None
+            field_mapping=field_mapping or None
         )
         db.session.add(definition)
         db.session.commit()
         
         # 重新加载适配器
-        from utils.interface_registry import registry
         registry.reload(interface_name)
+        invalidate_enabled_interfaces()
         
         return jsonify({
             'success': True,
@@ -370,14 +485,16 @@ def update_interface_definition(interface_name):
         if 'enabled' in data:
             definition.enabled = data['enabled']
         if 'field_mapping' in data:
-            definition.field_mapping = json.dumps(data['field_mapping']) if data['field_mapping'] else None
+            if data['field_mapping'] and not isinstance(data['field_mapping'], dict):
+                return jsonify({'error': '字段映射必须是JSON对象'}), 400
+            definition.field_mapping = data['field_mapping'] or None
         
         definition.update_time = datetime.utcnow()
         db.session.commit()
         
         # 重新加载适配器
-        from utils.interface_registry import registry
         registry.reload(interface_name)
+        invalidate_enabled_interfaces()
         
         return jsonify({
             'success': True,
@@ -396,20 +513,20 @@ def delete_interface_definition(interface_name):
         # 允许删除数据库记录
         # 不阻止删除，让用户可以重置为默认配置
         
-        definition = InterfaceDefinition.query.filter_by(interface_name=interface_name).first()
-        if not definition:
+        # 接口定义与相关API配置在同一事务中直接DELETE，不加载ORM对象
+        deleted = db.session.execute(
+            delete(InterfaceDefinition).where(InterfaceDefinition.interface_name == interface_name)
+        ).rowcount
+        if not deleted:
+            db.session.rollback()
             return jsonify({'error': '接口定义不存在'}), 404
         
-        # 删除相关的API配置
-        APIConfig.query.filter_by(interface=interface_name).delete()
-        
-        # 删除接口定义
-        db.session.delete(definition)
+        db.session.execute(delete(APIConfig).where(APIConfig.interface == interface_name))
         db.session.commit()
         
         # 从注册器中移除适配器
-        from utils.interface_registry import registry
         registry.unregister(interface_name)
+        invalidate_enabled_interfaces()
         
         return jsonify({
             'success': True,
@@ -425,24 +542,22 @@ def list_available_interfaces():
     """获取所有可用接口列表（仅自定义接口）"""
     try:
         # 从数据库获取所有启用的接口定义
-        definitions = InterfaceDefinition.query.filter_by(enabled=True).all()
-        defined_interfaces = {defn.interface_name for defn in definitions}
-        
-        # 合并结果（仅自定义接口）
-        all_interfaces = list(defined_interfaces)
-        
-        # 获取接口详细信息
-        interface_details = []
-        for interface_name in all_interfaces:
-            definition = InterfaceDefinition.query.filter_by(interface_name=interface_name).first()
-            if definition:
-                interface_details.append({
-                    'interface_name': interface_name,
-                    'display_name': definition.display_name,
-                    'description': definition.description,
-                    'enabled': definition.enabled,
-                    'is_builtin': False
-                })
+        # 只加载列表需要的列，不读取字段映射JSON
+        definitions = InterfaceDefinition.query.options(load_only(
+            InterfaceDefinition.interface_name,
+            InterfaceDefinition.display_name,
+            InterfaceDefinition.description,
+            InterfaceDefinition.enabled
+        )).filter_by(enabled=True).all()
+        
+        # 直接使用查询结果构建接口详细信息，避免逐个重新查询
+        interface_details = [{
+            'interface_name': definition.interface_name,
+            'display_name': definition.display_name,
+            'description': definition.description,
+            'enabled': definition.enabled,
+            'is_builtin': False
+        } for definition in definitions]
         
         return jsonify({
             'success': True,
@@ -456,10 +571,18 @@ def list_available_interfaces():
 def admin_get_announcement():
     """获取公告（管理端）"""
     try:
-        announcements = Announcement.query.order_by(Announcement.update_time.desc()).all()
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 50, type=int)
+        
+        # 分页；按列查询返回行元组，不构建ORM对象
+        rows, pagination = paginate_rows(
+            select(*Announcement.__table__.c).order_by(Announcement.update_time.desc()), page, per_page
+        )
+        
         return jsonify({
             'success': True,
-            'announcements': [ann.to_dict() for ann in announcements]
+            'announcements': rows_to_dicts(rows),
+            'pagination': pagination
         })
     except Exception:
         return jsonify({'error': '获取公告失败'}), 500
@@ -479,17 +602,20 @@ def admin_create_announcement():
         
         # 如果创建新公告，将旧公告设为非激活
         if is_active:
-            Announcement.query.update({Announcement.is_active: False})
+            # 只更新当前启用的公告（通常只有一条），不扫描整表
+            Announcement.query.filter(Announcement.is_active == True).update({Announcement.is_active: False})
         
+        now = datetime.utcnow()
         announcement = Announcement(
             title=title,
             content=content,
             is_active=is_active,
-            create_time=datetime.utcnow(),
-            update_time=datetime.utcnow()
+            create_time=now,
+            update_time=now
         )
         db.session.add(announcement)
         db.session.commit()
+        invalidate_stats_cache()
         
         return jsonify({
             'success': True,
@@ -505,7 +631,7 @@ def admin_create_announcement():
 def admin_update_announcement(announcement_id):
     """更新公告"""
     try:
-        announcement = Announcement.query.get(announcement_id)
+        announcement = db.session.get(Announcement, announcement_id)
         if not announcement:
             return jsonify({'error': '公告不存在'}), 404
         
@@ -519,7 +645,10 @@ def admin_update_announcement(announcement_id):
         
         # 如果激活新公告，将其他公告设为非激活
         if is_active and not announcement.is_active:
-            Announcement.query.filter(Announcement.id != announcement_id).update({Announcement.is_active: False})
+            Announcement.query.filter(
+                Announcement.is_active == True,
+                Announcement.id != announcement_id
+            ).update({Announcement.is_active: False})
         
         announcement.title = title
         announcement.content = content
@@ -528,6 +657,7 @@ def admin_update_announcement(announcement_id):
         announcement.update_time = datetime.utcnow()
         
         db.session.commit()
+        invalidate_stats_cache()
         
         return jsonify({
             'success': True,
@@ -543,12 +673,14 @@ def admin_update_announcement(announcement_id):
 def admin_delete_announcement(announcement_id):
     """删除公告"""
     try:
-        announcement = Announcement.query.get(announcement_id)
-        if not announcement:
+        # 确认记录由外键 ON DELETE CASCADE 清理
+        deleted = db.session.execute(delete(Announcement).where(Announcement.id == announcement_id)).rowcount
+        if not deleted:
+            db.session.rollback()
             return jsonify({'error': '公告不存在'}), 404
         
-        db.session.delete(announcement)
         db.session.commit()
+        invalidate_stats_cache()
         
         return jsonify({
             'success': True,
@@ -560,23 +692,25 @@ def admin_delete_announcement(announcement_id):
 
 @admin_bp.route('/admin/api/announcement/stats', methods=['GET'])
 @admin_required
+@cached_stats('announcement_stats')
 def admin_announcement_stats():
     """获取公告统计信息"""
     try:
-        # 总公告数
-        total_announcements = Announcement.query.count()
-        
-        # 启用的公告数
-        active_announcements = Announcement.query.filter_by(is_active=True).count()
-        
-        # 总确认数
-        total_confirms = IPAnnouncementConfirm.query.count()
-        
-        # 最近7天的确认数
         seven_days_ago = datetime.utcnow() - timedelta(days=7)
-        recent_confirms = IPAnnouncementConfirm.query.filter(
-            IPAnnouncementConfirm.confirm_time >= seven_days_ago
-        ).count()
+        
+        # 公告数/启用数、总确认数/最近7天确认数，条件聚合后合并为一条SQL
+        announcement_row = select(
+            func.count(Announcement.id),
+            func.count(case((Announcement.is_active == True, Announcement.id)))
+        ).subquery()
+        confirm_row = select(
+            func.count(IPAnnouncementConfirm.id),
+            func.count(case((IPAnnouncementConfirm.confirm_time >= seven_days_ago, IPAnnouncementConfirm.id)))
+        ).subquery()
+        (total_announcements, active_announcements, total_confirms, recent_confirms) = db.session.execute(
+            select(*announcement_row.c, *confirm_row.c)
+            .select_from(announcement_row.join(confirm_row, true()))
+        ).one()
         
         return jsonify({
             'success': True,
@@ -606,7 +740,7 @@ def admin_get_feedback():
         
         # 分页
         pagination = query.order_by(Feedback.create_time.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
+            page=page, per_page=per_page, max_per_page=ADMIN_MAX_PER_PAGE, error_out=False
         )
         
         feedbacks = pagination.items
@@ -615,8 +749,8 @@ def admin_get_feedback():
             'success': True,
             'feedbacks': [fb.to_dict() for fb in feedbacks],
             'pagination': {
-                'page': page,
-                'per_page': per_page,
+                'page': pagination.page,
+                'per_page': pagination.per_page,
                 'total': pagination.total,
                 'pages': pagination.pages
             }
@@ -629,7 +763,7 @@ def admin_get_feedback():
 def admin_update_feedback(feedback_id):
     """更新反馈状态（标记为已处理）"""
     try:
-        feedback = Feedback.query.get(feedback_id)
+        feedback = db.session.get(Feedback, feedback_id)
         if not feedback:
             return jsonify({'error': '反馈不存在'}), 404
         
@@ -638,8 +772,7 @@ def admin_update_feedback(feedback_id):
         remark = data.get('remark', '').strip()
         
         # 获取当前管理员用户名
-        admin_user = get_admin_user()
-        admin_username = admin_user.username if admin_user else '系统'
+        admin_username = session.get('admin_username') or '系统'
         
         feedback.status = status
         feedback.remark = remark if remark else None
@@ -647,6 +780,7 @@ def admin_update_feedback(feedback_id):
         feedback.process_by = admin_username
         
         db.session.commit()
+        invalidate_stats_cache()
         
         return jsonify({
             'success': True,
@@ -662,12 +796,13 @@ def admin_update_feedback(feedback_id):
 def admin_delete_feedback(feedback_id):
     """删除反馈"""
     try:
-        feedback = Feedback.query.get(feedback_id)
-        if not feedback:
+        deleted = db.session.execute(delete(Feedback).where(Feedback.id == feedback_id)).rowcount
+        if not deleted:
+            db.session.rollback()
             return jsonify({'error': '反馈不存在'}), 404
         
-        db.session.delete(feedback)
         db.session.commit()
+        invalidate_stats_cache()
         
         return jsonify({
             'success': True,
@@ -679,23 +814,21 @@ def admin_delete_feedback(feedback_id):
 
 @admin_bp.route('/admin/api/feedback/stats', methods=['GET'])
 @admin_required
+@cached_stats('feedback_stats')
 def admin_feedback_stats():
     """获取反馈统计信息"""
     try:
-        # 总反馈数
-        total_feedbacks = Feedback.query.count()
-        
-        # 待处理反馈数
-        pending_feedbacks = Feedback.query.filter_by(status='pending').count()
-        
-        # 已处理反馈数
-        processed_feedbacks = Feedback.query.filter_by(status='processed').count()
-        
-        # 最近7天的反馈数
         seven_days_ago = datetime.utcnow() - timedelta(days=7)
-        recent_feedbacks = Feedback.query.filter(
-            Feedback.create_time >= seven_days_ago
-        ).count()
+        
+        # 总数/待处理/已处理/最近7天，条件聚合一次扫描完成
+        (total_feedbacks, pending_feedbacks, processed_feedbacks, recent_feedbacks) = db.session.execute(
+            select(
+                func.count(Feedback.id),
+                func.count(case((Feedback.status == 'pending', Feedback.id))),
+                func.count(case((Feedback.status == 'processed', Feedback.id))),
+                func.count(case((Feedback.create_time >= seven_days_ago, Feedback.id)))
+            )
+        ).one()
         
         return jsonify({
             'success': True,
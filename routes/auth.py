@@ -1,12 +1,11 @@
 """
 用户认证相关路由
 """
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, Response, request, jsonify, session
 from models.database import db, User, AppConfig
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.pwhash import hash_password, verify_password
 from datetime import datetime
-import time
-from utils.request_auth import get_current_api_key, verify_signature, REQUEST_TIMEOUT
+from utils.request_auth import get_current_api_key, verify_signature, parse_timestamp, is_timestamp_fresh
 from utils.logger import get_auth_logger, get_audit_logger, log_error_with_context
 from utils.api_response import api_success, api_error, handle_exceptions
 
@@ -16,6 +15,13 @@ audit_logger = get_audit_logger()  # 审计日志，记录关键操作
 
 auth_bp = Blueprint('auth', __name__)
 
+# 未登录状态响应体（前端频繁轮询，预先编码避免每次JSON序列化）
+_LOGGED_OUT_BODY = b'{"logged_in":false}\n'
+
+def _logged_out_response():
+    # 每次新建Response：session保存等会修改响应头，不能共享同一对象
+    return Response(_LOGGED_OUT_BODY, mimetype='application/json')
+
 @auth_bp.route('/api/auth/register', methods=['POST'])
 @handle_exceptions
 def register():
@@ -37,14 +43,14 @@ def register():
             return api_error('密码长度至少6位', code=400, error_type='ValidationError')
         
         # 检查用户名是否已存在
-        existing_user = User.query.filter_by(username=username).first()
+        existing_user = db.session.query(db.session.query(User).filter_by(username=username).exists()).scalar()
         if existing_user:
             return api_error('用户名已存在', code=400, error_type='DuplicateError')
         
         # 创建新用户（增强密码哈希强度）
         new_user = User(
             username=username,
-            password=generate_password_hash(password, method='pbkdf2:sha256:260000'),
+            password=hash_password(password),
             register_time=datetime.utcnow()
         )
         
@@ -54,12 +60,13 @@ def register():
         # 设置session
         session['user_id'] = new_user.id
         session['username'] = new_user.username
+        user_dict = session['user_dict'] = new_user.to_dict()  # 供 /api/auth/status 直接返回，无需查库
         
         # 记录审计日志
         audit_logger.info(f"用户注册: {username} (ID: {new_user.id}) from {request.remote_addr}")
         
         return api_success(
-            data={'user': new_user.to_dict()},
+            data={'user': user_dict},
             message='注册成功',
             code=201
         )
@@ -88,12 +95,11 @@ def login():
             return api_error('登录请求缺少签名', code=403, error_type='AuthError')
 
         # 时间戳有效期校验
-        try:
-            ts = float(timestamp)
-        except Exception:
+        ts = parse_timestamp(timestamp)
+        if ts is None:
             return api_error('登录请求时间无效', code=403, error_type='AuthError')
 
-        if abs(time.time() - ts) > REQUEST_TIMEOUT:
+        if not is_timestamp_fresh(ts):
             return api_error('登录请求已过期，请刷新页面重试', code=403, error_type='AuthError')
 
         # 获取当前/旧密钥并验证签名
@@ -108,20 +114,21 @@ def login():
             return api_error('登录签名无效', code=403, error_type='AuthError')
         
         # 查找用户
-        user = User.query.filter_by(username=username).first()
-        if not user or not check_password_hash(user.password, password):
+        user = db.session.query(User).filter_by(username=username).first()
+        if not user or not verify_password(user.password, password):
             auth_logger.warning(f"登录失败: {username} from {request.remote_addr}")
             return api_error('用户名或密码错误', code=401, error_type='AuthError')
         
         # 设置session
         session['user_id'] = user.id
         session['username'] = user.username
+        user_dict = session['user_dict'] = user.to_dict()  # 供 /api/auth/status 直接返回，无需查库
         
         # 记录审计日志
         audit_logger.info(f"用户登录: {username} (ID: {user.id}) from {request.remote_addr}")
         
         return api_success(
-            data={'user': user.to_dict()},
+            data={'user': user_dict},
             message='登录成功'
         )
         
@@ -139,17 +146,22 @@ def logout():
 def get_auth_status():
     """获取当前登录状态"""
     user_id = session.get('user_id')
-    username = session.get('username')
     
     if user_id:
-        user = User.query.get(user_id)
-        if user:
-            return jsonify({
-                'logged_in': True,
-                'user': user.to_dict()
-            })
+        # 登录时已将用户信息缓存在session中，轮询状态时不再查库
+        user_dict = session.get('user_dict')
+        if user_dict is None:
+            # 旧session没有缓存，查库一次后补上
+            user = db.session.get(User, user_id)
+            if not user:
+                return _logged_out_response()
+            user_dict = session['user_dict'] = user.to_dict()
+        return jsonify({
+            'logged_in': True,
+            'user': user_dict
+        })
     
-    return jsonify({'logged_in': False})
+    return _logged_out_response()
 
 @auth_bp.route('/api/auth/api-key', methods=['GET'])
 def get_api_key():
@@ -173,7 +185,7 @@ def get_current_user():
     """获取当前登录用户"""
     user_id = session.get('user_id')
     if user_id:
-        return User.query.get(user_id)
+        return db.session.get(User, user_id)
     return None
 
 
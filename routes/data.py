@@ -4,18 +4,87 @@
 from flask import Blueprint, request, jsonify
 from models.database import db, Bookshelf, PlayHistory, User
 from routes.auth import get_current_user
-from datetime import datetime
-from sqlalchemy import func, distinct
+from datetime import datetime, timezone
+from sqlalchemy import func, and_
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import load_only
 from utils.logger import get_api_logger, get_db_logger, log_error_with_context
 from utils.api_response import api_success, api_error, handle_exceptions
 from utils.rate_limiter import rate_limit, normal_rate_limit
 
+try:
+    import ciso8601  # C实现的ISO-8601解析，支持的格式比旧版本 fromisoformat 更全
+except ImportError:  # pragma: no cover
+    ciso8601 = None
+
 # 初始化日志
 logger = get_api_logger()
 db_logger = get_db_logger()
 
 data_bp = Blueprint('data', __name__)
 
+# 同步书架时已有书籍允许更新的字段
+BOOKSHELF_SYNC_COLUMNS = ('book_title', 'book_image', 'book_anchor')
+
+def latest_history_join(user_id):
+    """
+    每本书（book_id + interface）最新播放时间的关联条件
+    使用 GROUP BY + MAX 再关联回原表，兼容不支持窗口函数的 MySQL 5.x
+    """
+    latest = db.session.query(
+        PlayHistory.book_id,
+        PlayHistory.interface,
+        func.max(PlayHistory.play_time).label('play_time')
+    ).filter(PlayHistory.user_id == user_id)\
+     .group_by(PlayHistory.book_id, PlayHistory.interface)\
+     .subquery()
+    return latest, and_(
+        PlayHistory.book_id == latest.c.book_id,
+        PlayHistory.interface == latest.c.interface,
+        PlayHistory.play_time == latest.c.play_time
+    )
+
+def upsert_bookshelf(rows):
+    """
+    批量写入书架：新书插入，已有的书（unique_user_book 冲突）只更新标题/封面/主播，保持原有添加时间
+    """
+    if db.engine.dialect.name == 'mysql':
+        stmt = mysql_insert(Bookshelf).values(rows)
+        stmt = stmt.on_duplicate_key_update(**{
+            column: getattr(stmt.inserted, column) for column in BOOKSHELF_SYNC_COLUMNS
+        })
+    else:
+        # SQLite / PostgreSQL
+        insert = sqlite_insert if db.engine.dialect.name == 'sqlite' else postgresql_insert
+        stmt = insert(Bookshelf).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'book_id', 'interface'],
+            set_={column: getattr(stmt.excluded, column) for column in BOOKSHELF_SYNC_COLUMNS}
+        )
+    db.session.execute(stmt)
+
+def parse_play_time(value, default):
+    """
+    解析客户端上传的播放时间（ISO格式），统一转换为UTC时间（不带时区）
+    没有时区信息的按UTC处理；为空或无法解析时返回default
+    """
+    if not value or not isinstance(value, str):
+        return default
+    try:
+        if ciso8601 is not None:
+            play_time = ciso8601.parse_datetime(value)
+        else:
+            if value.endswith('Z'):
+                value = value[:-1] + '+00:00'
+            play_time = datetime.fromisoformat(value)
+    except ValueError:
+        return default
+    if play_time.tzinfo:
+        play_time = play_time.astimezone(timezone.utc).replace(tzinfo=None)
+    return play_time
+
 # ========== 书架相关 ==========
 
 @data_bp.route('/api/bookshelf', methods=['GET'])
@@ -27,7 +96,11 @@ def get_bookshelf():
         return api_error('请先登录', code=401, error_type='AuthError')
     
     try:
-        books = Bookshelf.query.filter_by(user_id=user.id).order_by(Bookshelf.add_time.desc()).all()
+        # 只加载 to_dict() 用到的列
+        books = db.session.query(Bookshelf).options(load_only(
+            Bookshelf.id, Bookshelf.book_id, Bookshelf.interface, Bookshelf.book_title,
+            Bookshelf.book_image, Bookshelf.book_anchor, Bookshelf.add_time
+        )).filter_by(user_id=user.id).order_by(Bookshelf.add_time.desc()).all()
         logger.info(f"用户 {user.id} 获取书架，共 {len(books)} 本书")
         return api_success(data={'books': [book.to_dict() for book in books]})
     except Exception as e:
@@ -54,12 +127,12 @@ def add_to_bookshelf():
         if not book_id or not interface:
             return api_error('缺少必要参数', code=400, error_type='ValidationError')
         
-        # 检查是否已存在
-        existing = Bookshelf.query.filter_by(
+        # 检查是否已存在（EXISTS 走 unique_user_book 唯一索引，不加载整行）
+        existing = db.session.query(db.session.query(Bookshelf).filter_by(
             user_id=user.id,
             book_id=book_id,
             interface=interface
-        ).first()
+        ).exists()).scalar()
         
         if existing:
             return api_error('该书已在书架中', code=400, error_type='DuplicateError')
@@ -111,7 +184,7 @@ def remove_from_bookshelf():
         if not book_id or not interface:
             return api_error('缺少必要参数', code=400, error_type='ValidationError')
         
-        book = Bookshelf.query.filter_by(
+        book = db.session.query(Bookshelf).filter_by(
             user_id=user.id,
             book_id=book_id,
             interface=interface
@@ -150,11 +223,11 @@ def check_bookshelf():
         if not book_id or not interface:
             return jsonify({'in_bookshelf': False})
         
-        exists = Bookshelf.query.filter_by(
+        exists = db.session.query(db.session.query(Bookshelf).filter_by(
             user_id=user.id,
             book_id=book_id,
             interface=interface
-        ).first() is not None
+        ).exists()).scalar()
         
         return jsonify({'in_bookshelf': exists})
         
@@ -182,7 +255,10 @@ def sync_bookshelf():
         synced_count = 0
         skipped_count = 0
         error_count = 0
+        now = datetime.utcnow()  # 本批次统一使用同一时间，避免循环内重复取时间
         
+        # 整理本次上传的书籍（同一本书重复出现时以最后一条为准）
+        incoming = {}
         for book_data in local_bookshelf:
             try:
                 book_id = book_data.get('book_id')
@@ -192,36 +268,46 @@ def sync_bookshelf():
                     skipped_count += 1
                     continue
                 
-                # 检查数据库是否已有该书籍（必须指定user_id确保数据隔离）
-                existing = Bookshelf.query.filter_by(
-                    user_id=user.id,  # 关键：必须使用当前登录用户的ID
-                    book_id=book_id,
-                    interface=interface
-                ).first()
-                
-                if existing:
-                    # 如果已存在，更新信息（保持原有添加时间）
-                    existing.book_title = book_data.get('book_title', existing.book_title)
-                    existing.book_image = book_data.get('book_image', existing.book_image)
-                    existing.book_anchor = book_data.get('book_anchor', existing.book_anchor)
+                if (book_id, interface) in incoming:
                     skipped_count += 1
-                else:
-                    # 创建新记录（必须指定user_id）
-                    new_book = Bookshelf(
-                        user_id=user.id,  # 关键：使用当前登录用户的ID，确保数据隔离
-                        book_id=book_id,
-                        interface=interface,
-                        book_title=book_data.get('book_title', ''),
-                        book_image=book_data.get('book_image', ''),
-                        book_anchor=book_data.get('book_anchor', ''),
-                        add_time=datetime.utcnow()
-                    )
-                    db.session.add(new_book)
-                    synced_count += 1
+                incoming[(book_id, interface)] = book_data
             except Exception:
                 error_count += 1
                 continue
         
+        if incoming:
+            # 一次查询取出该用户已有书籍的可更新字段（只查列，不构建ORM对象；必须指定user_id确保数据隔离）
+            existing_map = {
+                (row.book_id, row.interface): row
+                for row in db.session.query(
+                    Bookshelf.book_id, Bookshelf.interface, *(getattr(Bookshelf, c) for c in BOOKSHELF_SYNC_COLUMNS)
+                ).filter(
+                    Bookshelf.user_id == user.id,  # 关键：必须使用当前登录用户的ID
+                    Bookshelf.book_id.in_({key[0] for key in incoming})
+                )
+            }
+            
+            rows = []
+            for key, book_data in incoming.items():
+                existing = existing_map.get(key)
+                if existing:
+                    # 已存在：未上传的字段保留原值（保持原有添加时间）
+                    skipped_count += 1
+                else:
+                    synced_count += 1
+                row = {
+                    'user_id': user.id,  # 关键：使用当前登录用户的ID，确保数据隔离
+                    'book_id': key[0],
+                    'interface': key[1],
+                    'add_time': now
+                }
+                for column in BOOKSHELF_SYNC_COLUMNS:
+                    row[column] = book_data.get(column, getattr(existing, column) if existing else '')
+                rows.append(row)
+            
+            # 一条 INSERT ... ON DUPLICATE KEY UPDATE 完成插入和更新
+            upsert_bookshelf(rows)
+        
         db.session.commit()
         
         result_message = f'同步完成：新增 {synced_count} 本，跳过 {skipped_count} 本'
@@ -254,42 +340,30 @@ def get_history():
         # 获取参数
         limit = request.args.get('limit', 100, type=int)
         
-        # 先检查是否有任何历史记录
-        total_count = PlayHistory.query.filter_by(user_id=user.id).count()
-        
-        if total_count == 0:
+        # 在SQL中完成去重：每本书（book_id + interface）只取最新播放时间对应的记录
+        latest, on_clause = latest_history_join(user.id)
+        rows = db.session.query(PlayHistory).options(load_only(
+            PlayHistory.id, PlayHistory.book_id, PlayHistory.interface, PlayHistory.chapter_id,
+            PlayHistory.chapter_title, PlayHistory.book_title, PlayHistory.book_image,
+            PlayHistory.book_anchor, PlayHistory.play_time
+        )).join(latest, on_clause)\
+          .filter(PlayHistory.user_id == user.id)\
+          .order_by(PlayHistory.play_time.desc(), PlayHistory.id.desc())\
+          .limit(limit)\
+          .all()
+        
+        if not rows:
             logger.info(f"用户 {user.id} 没有历史记录")
             return api_success(data={'history': []})
         
-        # 简化查询：先获取所有记录，然后在Python中处理去重
-        # 这样可以避免复杂的子查询可能导致的兼容性问题
-        all_history = PlayHistory.query.filter_by(user_id=user.id)\
-            .order_by(PlayHistory.play_time.desc())\
-            .all()
-        
-        # 在Python中处理：每本书（book_id + interface）只保留最新一条
-        history_dict = {}
-        for item in all_history:
-            try:
-                key = f"{item.book_id}_{item.interface}"
-                if key not in history_dict:
-                    history_dict[key] = item
-                else:
-                    # 如果已有记录，比较时间，保留更新的
-                    item_time = item.play_time if item.play_time else datetime.min
-                    dict_time = history_dict[key].play_time if history_dict[key].play_time else datetime.min
-                    if item_time > dict_time:
-                        history_dict[key] = item
-            except Exception as e:
-                db_logger.warning(f"处理历史记录项失败: {e}")
-                continue
-        
-        # 转换为列表并按时间排序
-        history = list(history_dict.values())
-        history.sort(key=lambda x: x.play_time if x.play_time else datetime.min, reverse=True)
-        
-        # 限制返回数量
-        history = history[:limit]
+        # 同一本书存在播放时间完全相同的多条记录时只保留一条
+        history = []
+        seen = set()
+        for item in rows:
+            key = (item.book_id, item.interface)
+            if key not in seen:
+                seen.add(key)
+                history.append(item)
         
         # 安全地转换为字典
         history_list = []
@@ -330,7 +404,7 @@ def add_history():
             return jsonify({'error': '缺少必要参数'}), 400
         
         # 检查同一本书是否已有记录（不检查章节，每本书只保留一条最新记录）
-        existing = PlayHistory.query.filter_by(
+        existing = db.session.query(PlayHistory).filter_by(
             user_id=user.id,
             book_id=book_id,
             interface=interface
@@ -385,7 +459,7 @@ def delete_history_item(history_id):
         return jsonify({'error': '请先登录'}), 401
     
     try:
-        history_item = PlayHistory.query.filter_by(
+        history_item = db.session.query(PlayHistory).filter_by(
             id=history_id,
             user_id=user.id
         ).first()
@@ -413,7 +487,7 @@ def clear_history():
         return jsonify({'error': '请先登录'}), 401
     
     try:
-        deleted_count = PlayHistory.query.filter_by(user_id=user.id).delete()
+        deleted_count = db.session.query(PlayHistory).filter_by(user_id=user.id).delete()
         db.session.commit()
         
         return jsonify({
@@ -446,7 +520,10 @@ def sync_history():
         synced_count = 0
         skipped_count = 0
         error_count = 0
+        now = datetime.utcnow()  # 本批次统一使用同一时间，避免循环内重复取时间
         
+        # 整理本次上传的历史记录（同一本书只保留播放时间最新的一条）
+        incoming = {}
         for item in local_history:
             try:
                 book_id = item.get('book_id')
@@ -458,37 +535,36 @@ def sync_history():
                     continue
                 
                 # 解析播放时间
-                play_time_str = item.get('play_time') or item.get('playTime')
-                try:
-                    if play_time_str:
-                        if isinstance(play_time_str, str):
-                            # 处理各种时间格式
-                            play_time_str = play_time_str.replace('Z', '+00:00')
-                            if '+' not in play_time_str and play_time_str.count(':') >= 2:
-                                # 如果没有时区信息，添加UTC时区
-                                play_time_str += '+00:00'
-                            play_time = datetime.fromisoformat(play_time_str)
-                            # 转换为UTC时间（如果时区信息存在）
-                            if play_time.tzinfo:
-                                play_time = play_time.astimezone(datetime.timezone.utc).replace(tzinfo=None)
-                        else:
-                            play_time = datetime.utcnow()
-                    else:
-                        play_time = datetime.utcnow()
-                except Exception:
-                    play_time = datetime.utcnow()
-                
-                # 检查数据库是否已有该书的记录（必须指定user_id确保数据隔离）
-                existing = PlayHistory.query.filter_by(
-                    user_id=user.id,  # 关键：必须使用当前登录用户的ID
-                    book_id=book_id,
-                    interface=interface
-                ).first()
+                play_time = parse_play_time(item.get('play_time') or item.get('playTime'), now)
                 
+                key = (book_id, interface)
+                if key in incoming:
+                    skipped_count += 1
+                    if play_time <= incoming[key][1]:
+                        continue
+                incoming[key] = (item, play_time)
+            except Exception:
+                error_count += 1
+                continue
+        
+        if incoming:
+            # 一次查询取出该用户已有的相关历史记录（必须指定user_id确保数据隔离）
+            existing_map = {}
+            for record in db.session.query(PlayHistory).filter(
+                PlayHistory.user_id == user.id,  # 关键：必须使用当前登录用户的ID
+                PlayHistory.book_id.in_({key[0] for key in incoming})
+            ):
+                key = (record.book_id, record.interface)
+                if key not in existing_map or record.play_time > existing_map[key].play_time:
+                    existing_map[key] = record
+            
+            new_mappings = []
+            for key, (item, play_time) in incoming.items():
+                existing = existing_map.get(key)
                 if existing:
                     # 如果本地记录更新，则更新数据库；否则跳过
                     if play_time > existing.play_time:
-                        existing.chapter_id = chapter_id
+                        existing.chapter_id = item.get('chapter_id')
                         existing.chapter_title = item.get('chapter_title', '')
                         existing.book_title = item.get('book_title', '')
                         existing.book_image = item.get('book_image', '')
@@ -499,22 +575,22 @@ def sync_history():
                         skipped_count += 1
                 else:
                     # 创建新记录（必须指定user_id）
-                    new_history = PlayHistory(
-                        user_id=user.id,  # 关键：使用当前登录用户的ID，确保数据隔离
-                        book_id=book_id,
-                        interface=interface,
-                        chapter_id=chapter_id,
-                        chapter_title=item.get('chapter_title', ''),
-                        book_title=item.get('book_title', ''),
-                        book_image=item.get('book_image', ''),
-                        book_anchor=item.get('book_anchor', ''),
-                        play_time=play_time
-                    )
-                    db.session.add(new_history)
-                    synced_count += 1
-            except Exception:
-                error_count += 1
-                continue
+                    new_mappings.append({
+                        'user_id': user.id,  # 关键：使用当前登录用户的ID，确保数据隔离
+                        'book_id': key[0],
+                        'interface': key[1],
+                        'chapter_id': item.get('chapter_id'),
+                        'chapter_title': item.get('chapter_title', ''),
+                        'book_title': item.get('book_title', ''),
+                        'book_image': item.get('book_image', ''),
+                        'book_anchor': item.get('book_anchor', ''),
+                        'play_time': play_time
+                    })
+            
+            # 新记录用一条Core INSERT批量写入（executemany，不经过ORM）
+            if new_mappings:
+                db.session.execute(PlayHistory.__table__.insert(), new_mappings)
+            synced_count += len(new_mappings)
         
         db.session.commit()
         
@@ -544,18 +620,8 @@ def get_stats():
         return jsonify({'error': '请先登录'}), 401
     
     try:
-        # 统计听过的书籍数（去重）- 使用Python去重避免MySQL 5.6兼容性问题
-        try:
-            all_books = db.session.query(
-                PlayHistory.book_id,
-                PlayHistory.interface
-            ).filter_by(user_id=user.id).distinct().all()
-            total_books = len(all_books) if all_books else 0
-        except Exception:
-            total_books = 0
-        
         # 统计听过的书籍数（每本书在播放历史中只保留最新记录）
-        total_books = PlayHistory.query.filter_by(user_id=user.id).count()
+        total_books = db.session.query(func.count(PlayHistory.id)).filter_by(user_id=user.id).scalar()
         
         # 统计听过的章节数（由于每本书只保留最新播放记录，这里统计的是用户播放过的书籍数量）
         # 实际上，PlayHistory表设计为每本书（user_id, book_id, interface）组合只保留一条记录
@@ -570,29 +636,33 @@ def get_stats():
         total_minutes = total_chapters * avg_minutes_per_chapter
         total_hours = total_minutes // 60
         
-        # 获取最近听的书籍（去重，按最新播放时间）- 简化查询避免group_by问题
+        # 获取最近听的书籍（去重，按最新播放时间），只查询需要的列并在SQL中取前10
         try:
-            # 先获取所有记录，在Python中处理
-            all_recent = PlayHistory.query.filter_by(user_id=user.id)\
-                .order_by(PlayHistory.play_time.desc())\
-                .all()
-            
-            # 去重：每本书只保留最新一条
-            recent_dict = {}
-            for item in all_recent:
-                key = f"{item.book_id}_{item.interface}"
-                if key not in recent_dict:
-                    recent_dict[key] = item
+            latest, on_clause = latest_history_join(user.id)
+            recent_rows = db.session.query(
+                PlayHistory.book_id,
+                PlayHistory.interface,
+                PlayHistory.book_title,
+                PlayHistory.book_image
+            ).join(latest, on_clause)\
+             .filter(PlayHistory.user_id == user.id)\
+             .order_by(PlayHistory.play_time.desc(), PlayHistory.id.desc())\
+             .limit(10)\
+             .all()
             
-            # 按时间排序并取前10
-            recent_list = list(recent_dict.values())
-            recent_list.sort(key=lambda x: x.play_time if x.play_time else datetime.min, reverse=True)
-            recent_books = [{
-                'book_id': item.book_id,
-                'interface': item.interface,
-                'book_title': item.book_title or '',
-                'book_image': item.book_image or ''
-            } for item in recent_list[:10]]
+            recent_books = []
+            seen = set()
+            for row in recent_rows:
+                key = (row.book_id, row.interface)
+                if key in seen:
+                    continue
+                seen.add(key)
+                recent_books.append({
+                    'book_id': row.book_id,
+                    'interface': row.interface,
+                    'book_title': row.book_title or '',
+                    'book_image': row.book_image or ''
+                })
         except Exception:
             recent_books = []
         
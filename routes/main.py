@@ -1,10 +1,77 @@
-from flask import render_template, request, jsonify
+from flask import render_template, request, jsonify, redirect, url_for, send_from_directory
 from utils.request_auth import verify_api_request
 from routes.auth import auth_bp
 from routes.data import data_bp
-from models.database import db, Announcement, IPAnnouncementConfirm, Feedback, InterfaceDefinition
+from models.database import db, Announcement, IPAnnouncementConfirm, Feedback
 from routes.auth import get_current_user
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+from werkzeug.routing import BaseConverter, ValidationError
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from utils.logger import get_logger
+from utils.interface_cache import get_enabled_interfaces, get_interface_names
+from utils.interface_registry import get_interface_adapter
+from utils.client_ip import get_client_ip
+from utils.api_response import validate_params
+from sqlalchemy import exists
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+logger = get_logger('main')
+
+# 多接口并发搜索：整次搜索最多等待的秒数（每个HTTP请求自身还有10秒超时）
+SEARCH_TIMEOUT = 15
+# 每个进程共用一个固定大小的搜索线程池，超时后仍在运行的上游请求不会让线程数随请求量增长
+SEARCH_MAX_WORKERS = 32
+
+_search_executor = None
+_search_executor_pid = None
+_search_executor_lock = threading.Lock()
+
+def _get_search_executor():
+    """按进程懒创建搜索线程池（fork 之后线程不会被继承）"""
+    global _search_executor, _search_executor_pid
+    if _search_executor is not None and _search_executor_pid == os.getpid():
+        return _search_executor
+    with _search_executor_lock:
+        if _search_executor is None or _search_executor_pid != os.getpid():
+            _search_executor = ThreadPoolExecutor(max_workers=SEARCH_MAX_WORKERS, thread_name_prefix='search')
+            _search_executor_pid = os.getpid()
+    return _search_executor
+
+# 章节列表每页最多条数（避免请求过大的分页拖垮接口）
+CHAPTER_PAGE_SIZE_MAX = 200
+
+def _search_one(adapter, keyword):
+    """在单个接口中搜索并返回标准化后的书籍列表"""
+    result = adapter.search_books(keyword)
+    if not result:
+        return []
+    return adapter.normalize_book_data(result)
+
+# 支持HTTPS的CDN域名列表（喜马拉雅等）
+HTTPS_SUPPORTED_DOMAINS = (
+    'audiopay.cos.tx.xmcdn.com',
+    'cos.tx.xmcdn.com',
+    'xmcdn.com',
+    'ximalaya.com',
+    'hls.ximalaya.com',
+    'fdfs.xmcdn.com',
+    'file.ximalaya.com'
+)
+HTTPS_SUPPORTED_DOMAIN_SET = frozenset(HTTPS_SUPPORTED_DOMAINS)
+
+def _is_https_supported_host(host):
+    """主机名是否为支持列表中的域名或其子域名（按域名标签从右向左匹配）"""
+    labels = host.rstrip('.').split('.')
+    for i in range(len(labels) - 1, -1, -1):
+        if '.'.join(labels[i:]) in HTTPS_SUPPORTED_DOMAIN_SET:
+            return True
+    return False
 
 def ensure_https_url(url):
     """
@@ -14,27 +81,50 @@ def ensure_https_url(url):
     if not url or not isinstance(url, str):
         return url
     
-    # 支持HTTPS的CDN域名列表（喜马拉雅等）
-    https_supported_domains = [
-        'audiopay.cos.tx.xmcdn.com',
-        'cos.tx.xmcdn.com',
-        'xmcdn.com',
-        'ximalaya.com',
-        'hls.ximalaya.com',
-        'fdfs.xmcdn.com',
-        'file.ximalaya.com'
-    ]
-    
-    # 如果URL是HTTP，且域名在支持列表中，转换为HTTPS
+    # 如果URL是HTTP，且主机名在支持列表中，转换为HTTPS
+    # 只看主机名，避免 xmcdn.com.evil.com 或查询参数中出现域名时误判
     if url.startswith('http://'):
-        for domain in https_supported_domains:
-            if domain in url:
-                url = url.replace('http://', 'https://', 1)
-                break
+        try:
+            host = urlsplit(url).hostname
+        except ValueError:
+            host = None
+        if host and _is_https_supported_host(host):
+            url = 'https://' + url[7:]
     
     return url
 
+def insert_announcement_confirm(ip_address, announcement_id):
+    """
+    插入IP公告确认记录，与 unique_ip_announcement 冲突时忽略
+    :return: 是否插入了新记录
+    """
+    values = {
+        'ip_address': ip_address,
+        'announcement_id': announcement_id,
+        'confirm_time': datetime.utcnow()
+    }
+    dialect = db.engine.dialect.name
+    if dialect == 'mysql':
+        stmt = mysql_insert(IPAnnouncementConfirm).values(values).prefix_with('IGNORE')
+    else:
+        # SQLite / PostgreSQL
+        insert = sqlite_insert if dialect == 'sqlite' else postgresql_insert
+        stmt = insert(IPAnnouncementConfirm).values(values).on_conflict_do_nothing(
+            index_elements=['ip_address', 'announcement_id']
+        )
+    return db.session.execute(stmt).rowcount > 0
+
+class InterfaceConverter(BaseConverter):
+    """路由中的接口名：不存在的接口在路由匹配阶段直接返回404，不再逐个请求查库加载适配器"""
+
+    def to_python(self, value):
+        if value not in get_interface_names():
+            raise ValidationError()
+        return value
+
 def register_routes(app):
+    app.url_map.converters['interface'] = InterfaceConverter
+    
     # 注册蓝图
     app.register_blueprint(auth_bp)
     app.register_blueprint(data_bp)
@@ -57,28 +147,19 @@ def register_routes(app):
     def list_interfaces():
         """获取所有可用的接口列表（前端可用）"""
         try:
-            from models.database import InterfaceDefinition
-            
-            # 从数据库获取所有启用的接口定义
-            definitions = InterfaceDefinition.query.filter_by(enabled=True).all()
-            
-            # 获取接口详细信息
-            interface_details = []
-            for definition in definitions:
-                interface_details.append({
-                    'interface_name': definition.interface_name,
-                    'display_name': definition.display_name,
-                    'description': definition.description or '自定义接口'
-                })
+            # 启用的接口列表有进程内缓存，后台修改接口定义时失效
+            interface_details = [{
+                'interface_name': item['interface_name'],
+                'display_name': item['display_name'],
+                'description': item['description'] or '自定义接口'
+            } for item in get_enabled_interfaces()]
             
             return jsonify({
                 'success': True,
                 'interfaces': interface_details
             })
         except Exception as e:
-            import traceback
-            print(f"获取接口列表失败: {e}")
-            traceback.print_exc()
+            logger.exception('获取接口列表失败')
             return jsonify({'error': f'获取接口列表失败: {str(e)}'}), 500
     
     @app.route('/search', methods=['POST'])
@@ -93,7 +174,6 @@ def register_routes(app):
             return jsonify({'error': '请选择接口'}), 400
         
         # 使用适配器搜索
-        from utils.interface_registry import get_interface_adapter
         adapter = get_interface_adapter(interface)
         
         if adapter:
@@ -112,40 +192,49 @@ def register_routes(app):
         keyword = request.args.get('keyword', '')
         
         if not keyword:
-            return render_template('index.html'), 302  # 重定向到主页
-        
-        # 搜索所有启用的接口
-        all_books = []
+            return redirect(url_for('index'))  # 重定向到主页
         
-        # 获取所有启用的接口
-        from models.database import InterfaceDefinition
-        definitions = InterfaceDefinition.query.filter_by(enabled=True).all()
+        # 搜索所有启用的接口，收集结果时直接去重（基于id和interface的组合），只保留一份列表
+        unique_books = []
+        seen_keys = set()
         
-        # 搜索每个接口
-        from utils.interface_registry import get_interface_adapter
-        for definition in definitions:
+        # 先在请求线程中取适配器（可能需要查库），再并发请求各接口，总耗时取决于最慢的接口
+        adapters = []
+        for item in get_enabled_interfaces():
+            name = item['interface_name']
             try:
-                adapter = get_interface_adapter(definition.interface_name)
-                if adapter:
-                    result = adapter.search_books(keyword)
-                    if result:
-                        books = adapter.normalize_book_data(result)
-                        all_books.extend(books)
-            except Exception as e:
-                print(f"搜索接口 {definition.interface_name} 失败: {e}")
-                import traceback
-                traceback.print_exc()
+                adapter = get_interface_adapter(name)
+            except Exception:
+                logger.exception('加载接口 %s 失败', name)
                 continue
+            if adapter:
+                adapters.append((name, adapter))
         
-        # 移除可能的重复书籍（基于id和interface的组合）
-        unique_books = []
-        seen_keys = set()
-        for book in all_books:
-            # 使用 id + interface 作为唯一键
-            key = f"{book.get('id', '')}_{book.get('interface', '')}"
-            if key not in seen_keys:
-                seen_keys.add(key)
-                unique_books.append(book)
+        if adapters:
+            executor = _get_search_executor()
+            futures = [(name, executor.submit(_search_one, adapter, keyword)) for name, adapter in adapters]
+            try:
+                deadline = time.monotonic() + SEARCH_TIMEOUT
+                # 按接口顺序收集结果，保证结果顺序稳定
+                for name, future in futures:
+                    try:
+                        books = future.result(timeout=max(deadline - time.monotonic(), 0))
+                    except FutureTimeoutError:
+                        logger.warning('搜索接口 %s 超时', name)
+                        continue
+                    except Exception:
+                        logger.exception('搜索接口 %s 失败', name)
+                        continue
+                    for book in books:
+                        # 使用 (id, interface) 元组作为唯一键，保留首次出现的书籍和原有顺序
+                        key = (book.get('id', ''), book.get('interface', ''))
+                        if key not in seen_keys:
+                            seen_keys.add(key)
+                            unique_books.append(book)
+            finally:
+                # 超时后不再等待，尚未开始的搜索直接取消，不占用共用线程池
+                for _, future in futures:
+                    future.cancel()
         
         return render_template('results.html', keyword=keyword, books=unique_books, total_books=len(unique_books))
     
@@ -160,7 +249,6 @@ def register_routes(app):
             return jsonify({'error': '缺少必要参数'}), 400
         
         # 使用适配器获取音频URL
-        from utils.interface_registry import get_interface_adapter
         adapter = get_interface_adapter(interface)
         
         if adapter:
@@ -174,11 +262,12 @@ def register_routes(app):
         else:
             return jsonify({'error': f'接口 {interface} 不存在或未配置'}), 404
     
-    @app.route('/detail/<book_id>/<interface>', methods=['GET'])
-    def detail(book_id, interface):
-        # 获取分页参数，默认第一页，每页50条
-        page = int(request.args.get('page', 1))
-        size = int(request.args.get('size', 50))
+    @app.route('/detail/<book_id>/<interface:interface>', methods=['GET'])
+    @validate_params(optional_params=[('page', int, 1), ('size', int, 50)])
+    def detail(validated_data, book_id, interface):
+        # 获取分页参数，默认第一页，每页50条；非法值使用默认值，每页条数限制在合理范围内
+        page = max(validated_data['page'], 1)
+        size = max(1, min(validated_data['size'], CHAPTER_PAGE_SIZE_MAX))
         
         # 分页信息
         pagination = {
@@ -189,11 +278,10 @@ def register_routes(app):
         }
         
         # 使用适配器获取章节列表
-        from utils.interface_registry import get_interface_adapter
         adapter = get_interface_adapter(interface)
         
         if not adapter:
-            return render_template('index.html'), 302  # 重定向到主页
+            return redirect(url_for('index'))  # 重定向到主页
         
         chapters_data = adapter.get_chapters(book_id, page, size)
         
@@ -219,14 +307,13 @@ def register_routes(app):
         
         return render_template('detail.html', book_id=book_id, interface=interface, pagination=pagination, **normalized_data)
     
-    @app.route('/player/<book_id>/<interface>/<chapter_id>', methods=['GET'])
+    @app.route('/player/<book_id>/<interface:interface>/<chapter_id>', methods=['GET'])
     def player(book_id, interface, chapter_id):
         # 使用适配器获取章节信息
-        from utils.interface_registry import get_interface_adapter
         adapter = get_interface_adapter(interface)
         
         if not adapter:
-            return render_template('index.html'), 302  # 重定向到主页
+            return redirect(url_for('index'))  # 重定向到主页
         
         # 获取章节列表
         chapters_data = adapter.get_chapters(book_id, page=1, size=100)
@@ -243,15 +330,15 @@ def register_routes(app):
         prev_chapter = None
         next_chapter = None
         
+        # 路由参数和适配器输出的 chapter_id 都是字符串，直接比较，不逐个转换
         chapters = normalized_data.get('chapters', [])
-        for i, chapter in enumerate(chapters):
-            if str(chapter['chapter_id']) == str(chapter_id):
-                current_chapter = chapter
-                if i > 0:
-                    prev_chapter = chapters[i-1]
-                if i < len(chapters) - 1:
-                    next_chapter = chapters[i+1]
-                break
+        i = next((i for i, chapter in enumerate(chapters) if chapter['chapter_id'] == chapter_id), None)
+        if i is not None:
+            current_chapter = chapters[i]
+            if i > 0:
+                prev_chapter = chapters[i-1]
+            if i < len(chapters) - 1:
+                next_chapter = chapters[i+1]
         
         if not current_chapter:
             current_chapter = {'title': '未知章节', 'duration': '未知'}
@@ -274,15 +361,21 @@ def register_routes(app):
     def get_announcement():
         """获取当前启用的公告"""
         try:
-            # 获取当前IP地址
-            ip_address = request.remote_addr
-            if request.headers.get('X-Forwarded-For'):
-                ip_address = request.headers.get('X-Forwarded-For').split(',')[0].strip()
+            # 获取当前IP地址（X-Forwarded-For 已由 ProxyFix 统一解析）
+            ip_address = get_client_ip()
             
-            # 获取当前启用的公告
-            announcement = Announcement.query.filter_by(is_active=True).order_by(Announcement.update_time.desc()).first()
+            # 获取当前启用的公告，同一条SQL中用EXISTS判断该IP是否已确认
+            # （unique_ip_announcement 唯一约束即为该子查询的索引）
+            confirmed_exists = exists().where(
+                IPAnnouncementConfirm.announcement_id == Announcement.id,
+                IPAnnouncementConfirm.ip_address == ip_address
+            )
+            row = db.session.query(Announcement, confirmed_exists.label('confirmed'))\
+                .filter(Announcement.is_active == True)\
+                .order_by(Announcement.update_time.desc())\
+                .first()
             
-            if not announcement:
+            if not row:
                 return jsonify({
                     'success': True,
                     'has_announcement': False,
@@ -290,13 +383,8 @@ def register_routes(app):
                     'confirmed': False
                 })
             
-            # 检查该IP是否已确认此公告
-            confirm_record = IPAnnouncementConfirm.query.filter_by(
-                ip_address=ip_address,
-                announcement_id=announcement.id
-            ).first()
-            
-            confirmed = confirm_record is not None
+            announcement, confirmed = row
+            confirmed = bool(confirmed)  # MySQL 的 EXISTS 返回 0/1
             
             return jsonify({
                 'success': True,
@@ -311,10 +399,8 @@ def register_routes(app):
     def confirm_announcement():
         """确认公告"""
         try:
-            # 获取当前IP地址
-            ip_address = request.remote_addr
-            if request.headers.get('X-Forwarded-For'):
-                ip_address = request.headers.get('X-Forwarded-For').split(',')[0].strip()
+            # 获取当前IP地址（X-Forwarded-For 已由 ProxyFix 统一解析）
+            ip_address = get_client_ip()
             
             data = request.get_json()
             announcement_id = data.get('announcement_id')
@@ -323,31 +409,22 @@ def register_routes(app):
                 return jsonify({'error': '缺少公告ID'}), 400
             
             # 检查公告是否存在且启用
-            announcement = Announcement.query.filter_by(id=announcement_id, is_active=True).first()
-            if not announcement:
+            announcement_exists = db.session.query(
+                Announcement.query.filter_by(id=announcement_id, is_active=True).exists()
+            ).scalar()
+            if not announcement_exists:
                 return jsonify({'error': '公告不存在或已禁用'}), 404
             
-            # 检查是否已确认
-            existing = IPAnnouncementConfirm.query.filter_by(
-                ip_address=ip_address,
-                announcement_id=announcement_id
-            ).first()
+            # 直接插入确认记录，已确认过时由唯一约束忽略，不再先查询
+            inserted = insert_announcement_confirm(ip_address, announcement_id)
+            db.session.commit()
             
-            if existing:
+            if not inserted:
                 return jsonify({
                     'success': True,
                     'message': '已确认过此公告'
                 })
             
-            # 创建确认记录
-            confirm_record = IPAnnouncementConfirm(
-                ip_address=ip_address,
-                announcement_id=announcement_id,
-                confirm_time=datetime.utcnow()
-            )
-            db.session.add(confirm_record)
-            db.session.commit()
-            
             return jsonify({
                 'success': True,
                 'message': '公告确认成功'
@@ -360,10 +437,8 @@ def register_routes(app):
     def submit_feedback():
         """提交用户反馈"""
         try:
-            # 获取当前IP地址
-            ip_address = request.remote_addr
-            if request.headers.get('X-Forwarded-For'):
-                ip_address = request.headers.get('X-Forwarded-For').split(',')[0].strip()
+            # 获取当前IP地址（X-Forwarded-For 已由 ProxyFix 统一解析）
+            ip_address = get_client_ip()
             
             # 获取当前用户（如果有）
             user = get_current_user()
@@ -379,16 +454,15 @@ def register_routes(app):
             if len(content) > 5000:
                 return jsonify({'error': '反馈内容不能超过5000字'}), 400
             
-            # 创建反馈记录
-            feedback = Feedback(
+            # 创建反馈记录（只写不读，直接执行INSERT，不构造ORM对象）
+            db.session.execute(Feedback.__table__.insert().values(
                 user_id=user_id,
                 ip_address=ip_address,
                 content=content,
                 contact=contact if contact else None,
                 status='pending',
                 create_time=datetime.utcnow()
-            )
-            db.session.add(feedback)
+            ))
             db.session.commit()
             
             return jsonify({
@@ -402,16 +476,10 @@ def register_routes(app):
     @app.route('/static/manifest.json')
     def manifest():
         """返回 PWA manifest.json"""
-        from flask import send_from_directory
-        import os
         return send_from_directory(os.path.join(app.root_path, 'static'), 'manifest.json', mimetype='application/manifest+json')
     
     @app.route('/static/sw.js')
     def service_worker():
         """返回 Service Worker"""
-        from flask import send_from_directory, Response
-        import os
-        sw_path = os.path.join(app.root_path, 'static', 'sw.js')
-        with open(sw_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        return Response(content, mimetype='application/javascript')
+        # 与 manifest 一致交给 send_from_directory：支持 ETag/304 条件请求，无需每次读取文件内容
+        return send_from_directory(os.path.join(app.root_path, 'static'), 'sw.js', mimetype='application/javascript')
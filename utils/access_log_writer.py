@@ -0,0 +1,112 @@
+"""
+IP访问记录异步写入器
+请求线程只负责把记录放入内存队列，由后台线程批量写入数据库
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from models.database import db, IPAccessLog
+from utils.logger import get_db_logger
+
+logger = get_db_logger()
+
+QUEUE_MAXSIZE = 10000  # 队列最大长度，超出后丢弃记录，保证请求不被阻塞
+BATCH_SIZE = 500  # 每批最多写入条数
+FLUSH_INTERVAL = 1.0  # 最长等待时间（秒），到时即使不满一批也写入
+
+_INSERT_STMT = IPAccessLog.__table__.insert()
+
+
+class AccessLogWriter:
+    """访问记录批量写入器（每个进程一个后台线程）"""
+
+    def __init__(self, maxsize=QUEUE_MAXSIZE, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped_count = 0
+        self._app = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """绑定Flask应用（后台线程写库需要应用上下文）"""
+        self._app = app
+        atexit.register(self.flush)
+
+    def _ensure_started(self):
+        """按进程懒启动后台线程（gunicorn等fork之后线程不会被继承）"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='access-log-writer', daemon=True)
+            self._thread.start()
+
+    def put(self, record):
+        """提交一条访问记录（不阻塞，队列满则丢弃）"""
+        if self._app is None:
+            return
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped_count += 1
+
+    def _drain(self, timeout):
+        """取出最多 batch_size 条记录，最多等待 timeout 秒"""
+        items = []
+        deadline = time.monotonic() + timeout
+        while len(items) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _write(self, items):
+        """批量写入数据库"""
+        if not items:
+            return
+        with self._app.app_context():
+            try:
+                # 直接使用 Core 的 executemany 写入，不经过 ORM session；
+                # pymysql 会把多行 INSERT 合并为一条多 VALUES 语句
+                with db.engine.begin() as conn:
+                    conn.execute(_INSERT_STMT, items)
+            except Exception as e:
+                logger.warning(f"批量写入访问记录失败（{len(items)} 条）: {e}")
+
+    def _run(self):
+        while True:
+            try:
+                self._write(self._drain(self.flush_interval))
+            except Exception as e:
+                logger.warning(f"访问记录写入线程异常: {e}")
+
+    def flush(self):
+        """写入队列中剩余的记录（进程退出时调用）"""
+        if self._app is None:
+            return
+        while True:
+            items = []
+            while len(items) < self.batch_size:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not items:
+                break
+            self._write(items)
+
+
+# 全局写入器实例
+access_log_writer = AccessLogWriter()
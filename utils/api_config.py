@@ -3,6 +3,9 @@ API配置工具 - 从数据库读取接口配置
 """
 from models.database import db, APIConfig
 from flask import current_app
+from utils.logger import get_logger
+
+logger = get_logger('api_config')
 
 def get_api_config(interface, config_type):
     """
@@ -30,6 +33,56 @@ def get_api_config(interface, config_type):
                 result['_url'] = config.config_value
         
         return result
-    except Exception as e:
-        print(f"获取API配置失败: {e}")
-        return {}
\ No newline at end of file
+    except Exception:
+        logger.exception('获取API配置失败')
+        return {}
+
+def get_api_configs(interface, config_types=('search', 'chapters', 'url')):
+    """
+    一次查询获取接口的多类API配置
+    :param interface: 接口名称
+    :param config_types: 需要的配置类型
+    :return: dict {配置类型: 配置字典}，没有配置的类型为空字典
+    """
+    result = {config_type: {} for config_type in config_types}
+    try:
+        configs = APIConfig.query.filter(
+            APIConfig.interface == interface,
+            APIConfig.config_type.in_(config_types)
+        ).all()
+        
+        for config in configs:
+            if config.config_key:
+                result[config.config_type][config.config_key] = config.config_value
+            else:
+                result[config.config_type]['_url'] = config.config_value
+        
+        return result
+    except Exception:
+        logger.exception('获取API配置失败')
+        return {config_type: {} for config_type in config_types}
+
+def get_api_configs_for_interfaces(interfaces, config_types=('search', 'chapters', 'url')):
+    """
+    一次查询获取多个接口的API配置（批量重新加载适配器时使用）
+    :param interfaces: 接口名称列表
+    :param config_types: 需要的配置类型
+    :return: dict {接口名称: {配置类型: 配置字典}}
+    """
+    result = {interface: {config_type: {} for config_type in config_types} for interface in interfaces}
+    if not result:
+        return result
+    try:
+        configs = APIConfig.query.filter(
+            APIConfig.interface.in_(list(result)),
+            APIConfig.config_type.in_(config_types)
+        ).all()
+        
+        for config in configs:
+            key = config.config_key or '_url'
+            result[config.interface][config.config_type][key] = config.config_value
+        
+        return result
+    except Exception:
+        logger.exception('获取API配置失败')
+        return {interface: {config_type: {} for config_type in config_types} for interface in interfaces}
@@ -1,13 +1,26 @@
 """
 统一的API响应格式工具
 """
-from flask import jsonify
-from datetime import datetime
+from flask import jsonify, request
+import time
 from functools import wraps
 from utils.logger import get_api_logger, log_error_with_context
 
 logger = get_api_logger()
 
+# 响应时间戳精确到秒，同一秒内复用已格式化的字符串
+_timestamp_cache = (None, None)
+
+def utc_timestamp():
+    """当前UTC时间的ISO格式字符串（如 2024-01-01T00:00:00Z）"""
+    global _timestamp_cache
+    now = int(time.time())
+    second, formatted = _timestamp_cache
+    if second != now:
+        formatted = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now))
+        _timestamp_cache = (now, formatted)
+    return formatted
+
 def api_success(data=None, message=None, code=200):
     """
     成功响应
@@ -22,7 +35,7 @@ def api_success(data=None, message=None, code=200):
     """
     response = {
         'success': True,
-        'timestamp': datetime.utcnow().isoformat() + 'Z'
+        'timestamp': utc_timestamp()
     }
     
     if message:
@@ -49,7 +62,7 @@ def api_error(error_message, code=400, error_type=None, details=None):
     response = {
         'success': False,
         'error': error_message,
-        'timestamp': datetime.utcnow().isoformat() + 'Z'
+        'timestamp': utc_timestamp()
     }
     
     if error_type:
@@ -63,6 +76,18 @@ def api_error(error_message, code=400, error_type=None, details=None):
     
     return jsonify(response), code
 
+def _to_bool(value):
+    """布尔参数转换：字符串按 true/1/yes 判断"""
+    if isinstance(value, str):
+        return value.lower() in ('true', '1', 'yes')
+    return bool(value)
+
+def _param_converter(param_type):
+    """根据参数类型返回转换函数（装饰时确定，请求时直接调用）"""
+    if param_type == bool:
+        return _to_bool
+    return param_type
+
 def validate_params(required_params=None, optional_params=None):
     """
     参数验证装饰器
@@ -80,11 +105,23 @@ def validate_params(required_params=None, optional_params=None):
             book_id = validated_data['book_id']
             ...
     """
+    # 装饰时预先解析好每个参数的转换函数和默认值
+    required = [
+        (param_name, _param_converter(param_type), param_type.__name__)
+        for param_name, param_type in (required_params or [])
+    ]
+    optional = []
+    for param_info in (optional_params or []):
+        if len(param_info) == 3:
+            param_name, param_type, default_value = param_info
+        else:
+            param_name, param_type = param_info
+            default_value = None
+        optional.append((param_name, _param_converter(param_type), default_value))
+    
     def decorator(f):
         @wraps(f)
         def wrapper(*args, **kwargs):
-            from flask import request
-            
             # 获取请求数据
             if request.method == 'GET':
                 data = request.args.to_dict()
@@ -94,66 +131,37 @@ def validate_params(required_params=None, optional_params=None):
             validated_data = {}
             
             # 验证必需参数
-            if required_params:
-                for param_name, param_type in required_params:
-                    value = data.get(param_name)
-                    
-                    if value is None or value == '':
-                        return api_error(
-                            f'缺少必需参数: {param_name}',
-                            code=400,
-                            error_type='ValidationError'
-                        )
-                    
-                    # 类型转换
-                    try:
-                        if param_type == bool:
-                            # 特殊处理布尔值
-                            if isinstance(value, str):
-                                validated_data[param_name] = value.lower() in ('true', '1', 'yes')
-                            else:
-                                validated_data[param_name] = bool(value)
-                        elif param_type == int:
-                            validated_data[param_name] = int(value)
-                        elif param_type == float:
-                            validated_data[param_name] = float(value)
-                        else:
-                            validated_data[param_name] = param_type(value)
-                    except (ValueError, TypeError) as e:
-                        return api_error(
-                            f'参数类型错误: {param_name} 应为 {param_type.__name__}',
-                            code=400,
-                            error_type='ValidationError'
-                        )
+            for param_name, convert, type_name in required:
+                value = data.get(param_name)
+                
+                if value is None or value == '':
+                    return api_error(
+                        f'缺少必需参数: {param_name}',
+                        code=400,
+                        error_type='ValidationError'
+                    )
+                
+                # 类型转换
+                try:
+                    validated_data[param_name] = convert(value)
+                except (ValueError, TypeError):
+                    return api_error(
+                        f'参数类型错误: {param_name} 应为 {type_name}',
+                        code=400,
+                        error_type='ValidationError'
+                    )
             
-            # 验证可选参数
-            if optional_params:
-                for param_info in optional_params:
-                    if len(param_info) == 3:
-                        param_name, param_type, default_value = param_info
-                    else:
-                        param_name, param_type = param_info
-                        default_value = None
-                    
-                    value = data.get(param_name, default_value)
-                    
-                    if value is not None:
-                        try:
-                            if param_type == bool:
-                                if isinstance(value, str):
-                                    validated_data[param_name] = value.lower() in ('true', '1', 'yes')
-                                else:
-                                    validated_data[param_name] = bool(value)
-                            elif param_type == int:
-                                validated_data[param_name] = int(value)
-                            elif param_type == float:
-                                validated_data[param_name] = float(value)
-                            else:
-                                validated_data[param_name] = param_type(value)
-                        except (ValueError, TypeError):
-                            validated_data[param_name] = default_value
-                    else:
+            # 验证可选参数（缺失或转换失败时使用默认值）
+            for param_name, convert, default_value in optional:
+                value = data.get(param_name, default_value)
+                
+                if value is not None:
+                    try:
+                        validated_data[param_name] = convert(value)
+                    except (ValueError, TypeError):
                         validated_data[param_name] = default_value
+                else:
+                    validated_data[param_name] = default_value
             
             # 将验证后的数据传递给函数
             return f(validated_data, *args, **kwargs)
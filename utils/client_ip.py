@@ -0,0 +1,13 @@
+"""
+客户端IP工具
+代理头（X-Forwarded-For）由 app.py 中的 ProxyFix 统一解析，这里只读取结果
+"""
+from flask import g, request
+
+def get_client_ip():
+    """获取客户端真实IP地址（每个请求只解析一次，结果缓存在 g 上）"""
+    ip_address = getattr(g, '_client_ip', None)
+    if ip_address is None:
+        ip_address = request.remote_addr
+        g._client_ip = ip_address
+    return ip_address
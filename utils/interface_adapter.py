@@ -4,10 +4,200 @@
 """
 import requests
 import json
+import re
 import time
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from abc import ABC, abstractmethod
+from functools import lru_cache
+from operator import itemgetter
+from urllib.parse import quote
+from http.cookiejar import DefaultCookiePolicy
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from utils.logger import get_logger
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+logger = get_logger('interface_adapter')
+
+# 连接池大小：每个上游主机保持的连接数（gevent worker 下同一进程会并发请求多个接口）
+HTTP_POOL_CONNECTIONS = 32
+HTTP_POOL_MAXSIZE = 64
+
+# 上游临时故障（连接失败、限流、网关错误）时的重试次数和退避系数
+HTTP_MAX_RETRIES = 2
+HTTP_RETRY_BACKOFF = 0.2
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+def _create_http_session():
+    """
+    创建所有适配器共用的HTTP会话
+    复用 keep-alive 连接，避免每次请求重新建立TCP/TLS连接
+    """
+    session = requests.Session()
+    # 读超时不重试（上游已经很慢，重试只会让用户等更久）；
+    # 不按 Retry-After 等待，避免搜索被单个限流的接口拖住
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        read=False,
+        backoff_factor=HTTP_RETRY_BACKOFF,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'POST']),
+        respect_retry_after_header=False,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE,
+                          max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    # 会话在所有用户和接口间共享，不保存上游返回的Cookie（与原先每次独立请求的行为一致）
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+http_session = _create_http_session()
+
+def _parse_json(response):
+    """解析JSON响应：优先使用 orjson 直接解析字节，非UTF-8等情况回退到 requests 按响应编码解析"""
+    if orjson is not None:
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            pass
+    return response.json()
+
+
+# URL/表单模板中支持的占位符
+_PLACEHOLDER_RE = re.compile(r'\{(keyword|bookId|page|size|chapterId|trackId|timestamp)\}')
+
+
+def _template_placeholders(template):
+    """模板中用到的占位符名称集合"""
+    return frozenset(_PLACEHOLDER_RE.findall(template)) if isinstance(template, str) else frozenset()
+
+
+def _fill_placeholders(template, values):
+    """一次扫描替换模板中的占位符，values 中没有的占位符保持原样"""
+    return _PLACEHOLDER_RE.sub(lambda m: values.get(m.group(1), m.group(0)), template)
+
+
+def _json_placeholders(value):
+    """JSON请求体（包括键名）中用到的占位符名称集合"""
+    if isinstance(value, str):
+        return _template_placeholders(value)
+    if isinstance(value, dict):
+        return frozenset().union(*(_json_placeholders(k) | _json_placeholders(v) for k, v in value.items()))
+    if isinstance(value, list):
+        return frozenset().union(*(_json_placeholders(v) for v in value))
+    return frozenset()
+
+
+def _fill_json_placeholders(value, values):
+    """
+    替换JSON请求体中字符串（包括键名）里的占位符，返回新的对象
+    直接遍历结构，不经过 json.dumps/json.loads，替换值中的引号等字符也不会破坏JSON
+    """
+    if isinstance(value, str):
+        return _fill_placeholders(value, values) if '{' in value else value
+    if isinstance(value, dict):
+        return {_fill_json_placeholders(k, values): _fill_json_placeholders(v, values) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill_json_placeholders(v, values) for v in value]
+    return value
+
+
+def _parse_headers(headers):
+    """解析请求头配置：JSON字符串转换为dict，解析失败时使用空请求头"""
+    if isinstance(headers, str):
+        try:
+            return json.loads(headers)
+        except ValueError:
+            return {}
+    return headers
+
+
+# 书籍搜索结果中需要提取的字段（按输出顺序），以及缺失时默认为 'N/A' 的字段
+BOOK_FIELDS = ('id', 'bookTitle', 'bookName', 'bookAnchor', 'bookImage', 'bookDesc', 'count', 'heat')
+BOOK_NA_DEFAULT_FIELDS = frozenset(('count', 'heat', 'bookName'))
+
+
+@lru_cache(maxsize=1024)
+def _compile_path(path):
+    """
+    将点号分隔的字段路径解析为键元组（结果缓存，同一路径只拆分一次）
+    空路径或 'N/A' 返回 None
+    """
+    if not path or path == 'N/A':
+        return None
+    return tuple(path.split('.'))
+
+
+def _get_path_value(data, keys):
+    """按键元组逐层取值，路径不存在时返回None"""
+    value = data
+    for key in keys:
+        if isinstance(value, dict):
+            value = value.get(key)
+        else:
+            return None
+        if value is None:
+            return None
+    return value
+
+
+def _compile_data_path(path):
+    """解析数据路径（与 _get_nested_value 一致：空路径返回 None，'N/A' 按普通键处理）"""
+    if not path:
+        return None
+    return _compile_path(path) or (path,)
+
+
+def _get_compiled_value(data, keys, default=''):
+    """按已解析的键元组提取值，结果为 None 或空字符串时返回默认值"""
+    if not keys:
+        return default
+    result = _get_path_value(data, keys)
+    if result is None or result == '':
+        return default
+    return result
+
+
+@lru_cache(maxsize=4096)
+def _format_seconds(duration):
+    """数字时长转换为 MM:SS 格式（章节时长的取值有限，缓存格式化结果）"""
+    try:
+        seconds = int(duration)
+        minutes = seconds // 60
+        secs = seconds % 60
+        return f"{minutes:02d}:{secs:02d}"
+    except (ValueError, TypeError):
+        return str(duration)
+
+
+def _make_getter(keys, default=''):
+    """
+    为单个字段生成取值函数（构造适配器时生成一次）
+    单层路径（最常见）直接 dict.get，不再走通用的逐层查找
+    """
+    if not keys:
+        return lambda item: default
+    if len(keys) == 1:
+        key = keys[0]
+
+        def get_value(item):
+            value = item.get(key) if isinstance(item, dict) else None
+            return default if value is None or value == '' else value
+        return get_value
+
+    def get_value(item):
+        value = _get_path_value(item, keys)
+        return default if value is None or value == '' else value
+    return get_value
 
 
 class InterfaceAdapter(ABC):
@@ -24,6 +214,74 @@ class InterfaceAdapter(ABC):
         self.search_config = config.get('search', {})
         self.chapters_config = config.get('chapters', {})
         self.url_config = config.get('url', {})
+        
+        # 请求头可能以JSON字符串形式配置，只在构造时解析一次
+        self._search_headers = _parse_headers(self.search_config.get('headers', {}))
+        self._chapters_headers = _parse_headers(self.chapters_config.get('headers', {}))
+        self._url_headers = _parse_headers(self.url_config.get('headers', {}))
+        
+        # URL模板（支持 url 和 _url 两种键名）及其中用到的占位符
+        self._search_url_template = self.search_config.get('url', '') or self.search_config.get('_url', '')
+        self._search_url_placeholders = _template_placeholders(self._search_url_template)
+        self._chapters_url_template = self.chapters_config.get('url', '') or self.chapters_config.get('_url', '')
+        self._chapters_url_placeholders = _template_placeholders(self._chapters_url_template)
+        self._url_url_template = self.url_config.get('url', '') or self.url_config.get('_url', '')
+        self._url_url_placeholders = _template_placeholders(self._url_url_template)
+        
+        # POST请求体中用到的占位符，没有占位符的请求体直接使用配置，不再复制
+        self._search_body_placeholders = _json_placeholders(self.search_config.get('post_data', {}).get('data', {}))
+        self._chapters_body_placeholders = _json_placeholders(self.chapters_config.get('post_data', {}).get('data', {}))
+        self._url_body_placeholders = _json_placeholders(self.url_config.get('post_data', {}).get('data', {}))
+        
+        # 字段映射在适配器生命周期内不变，预先取出成功标识、数据路径并生成各字段的取值函数
+        search_mapping = self.search_config.get('field_mapping', {})
+        self._search_success_field = search_mapping.get('success_field')  # 成功标识字段（可能为None）
+        self._search_success_value = search_mapping.get('success_value')  # 成功值（可能为None）
+        self._search_data_path = search_mapping.get('data_path', 'data.bookData')  # 数据路径
+        self._search_data_keys = _compile_data_path(self._search_data_path)
+        
+        chapters_mapping = self.chapters_config.get('field_mapping', {})
+        self._chapters_success_field = chapters_mapping.get('success_field', 'status')
+        self._chapters_success_value = chapters_mapping.get('success_value', 0)
+        self._chapters_data_keys = _compile_data_path(chapters_mapping.get('data_path', 'data.list'))
+        book_info_map = chapters_mapping.get('book_info_fields', {})
+        self._book_info_getters = tuple(
+            (info_key, _make_getter(_compile_path(book_info_map.get(info_key, default_path))))
+            for info_key, default_path in (('book_title', 'bookTitle'), ('book_image', 'bookImage'), ('book_anchor', 'bookHost'))
+        )
+        
+        url_mapping = self.url_config.get('field_mapping', {})
+        self._url_success_field = url_mapping.get('success_field', 'status')
+        self._url_success_value = url_mapping.get('success_value', 0)
+        self._get_audio_url_value = _make_getter(_compile_path(url_mapping.get('url_field', 'src')))
+        
+        self._book_getters = self._build_book_getters()
+        self._chapter_getters = self._build_chapter_getters()
+    
+    def _build_book_getters(self):
+        """生成书籍字段的 (字段名, 取值函数) 列表"""
+        field_map = self.search_config.get('field_mapping', {}).get('fields', {})
+        getters = []
+        for field_key in BOOK_FIELDS:
+            mapped_field = field_map.get(field_key, field_key)
+            if mapped_field == 'N/A':
+                # 映射值是 'N/A'，直接使用 'N/A'
+                getters.append((field_key, _make_getter(None, 'N/A')))
+            else:
+                default = 'N/A' if field_key in BOOK_NA_DEFAULT_FIELDS else ''
+                getters.append((field_key, _make_getter(_compile_path(mapped_field), default)))
+        return tuple(getters)
+    
+    def _build_chapter_getters(self):
+        """生成章节字段的取值函数：(章节ID, 标题, 时长, 排序, 时长格式)"""
+        chapter_map = self.chapters_config.get('field_mapping', {}).get('chapter_fields', {})
+        return (
+            _make_getter(_compile_path(chapter_map.get('chapter_id', 'chapterId'))),
+            _make_getter(_compile_path(chapter_map.get('title', 'title'))),
+            _make_getter(_compile_path(chapter_map.get('duration', 'time'))),
+            _make_getter(_compile_path(chapter_map.get('order', 'position')), 0),
+            chapter_map.get('duration_format', 'auto')
+        )
     
     @abstractmethod
     def search_books(self, keyword: str) -> Optional[Dict]:
@@ -103,56 +361,40 @@ class InterfaceAdapter(ABC):
         if not raw_data:
             return []
         
-        # 获取字段映射配置
-        mapping = self.search_config.get('field_mapping', {})
-        success_field = mapping.get('success_field')  # 成功标识字段（可能为None）
-        success_value = mapping.get('success_value')  # 成功值（可能为None）
-        data_path = mapping.get('data_path', 'data.bookData')  # 数据路径
+        # 字段映射配置（构造时已取出）
+        success_field = self._search_success_field
+        data_path = self._search_data_path
+        data_keys = self._search_data_keys
+        
+        # 提取数据列表
+        data_list = _get_path_value(raw_data, data_keys) if data_keys else None
         
         # 检查是否成功（如果success_field为None，则跳过检查）
         if success_field is not None:
             actual_value = raw_data.get(success_field)
-            if actual_value != success_value:
-                print(f"[{self.interface_name}] 搜索失败: success_field={success_field}, expected={success_value}, actual={actual_value}")
+            if actual_value != self._search_success_value:
+                logger.warning("[%s] 搜索失败: success_field=%s, expected=%s, actual=%s",
+                               self.interface_name, success_field, self._search_success_value, actual_value)
                 return []
-        else:
+        elif data_list is None:
             # 如果没有配置success_field，检查data_path是否存在
-            data_check = self._get_nested_value(raw_data, data_path)
-            if data_check is None:
-                print(f"[{self.interface_name}] 搜索失败: 数据路径 {data_path} 不存在")
-                return []
+            logger.warning("[%s] 搜索失败: 数据路径 %s 不存在", self.interface_name, data_path)
+            return []
         
-        # 提取数据列表
-        data_list = self._get_nested_value(raw_data, data_path)
         if not isinstance(data_list, list):
-            print(f"[{self.interface_name}] 数据路径错误: data_path={data_path}, result_type={type(data_list)}, result={data_list}")
+            logger.warning("[%s] 数据路径错误: data_path=%s, result_type=%s, result=%.200s",
+                           self.interface_name, data_path, type(data_list), data_list)
             return []
         
-        print(f"[{self.interface_name}] 搜索成功，找到 {len(data_list)} 条结果")
-        
-        # 字段映射
-        field_map = mapping.get('fields', {})
+        logger.debug("[%s] 搜索成功，找到 %d 条结果", self.interface_name, len(data_list))
         
+        # 字段映射：使用构造时生成的取值函数
+        book_getters = self._book_getters
+        interface_name = self.interface_name
         normalized = []
         for item in data_list:
-            # 对于每个字段，如果映射值是 'N/A'，直接使用 'N/A'，否则从数据中提取
-            def get_field_value(field_key: str, default_field: str = None) -> Any:
-                mapped_field = field_map.get(field_key, default_field or field_key)
-                if mapped_field == 'N/A':
-                    return 'N/A'
-                return self._get_mapped_value(item, mapped_field, default='N/A' if field_key in ['count', 'heat', 'bookName'] else '')
-            
-            book = {
-                'id': get_field_value('id', 'id'),
-                'bookTitle': get_field_value('bookTitle', 'bookTitle'),
-                'bookName': get_field_value('bookName', 'bookName'),
-                'bookAnchor': get_field_value('bookAnchor', 'bookAnchor'),
-                'bookImage': get_field_value('bookImage', 'bookImage'),
-                'bookDesc': get_field_value('bookDesc', 'bookDesc'),
-                'count': get_field_value('count', 'count'),
-                'heat': get_field_value('heat', 'heat'),
-                'interface': self.interface_name
-            }
+            book = {field_key: get_value(item) for field_key, get_value in book_getters}
+            book['interface'] = interface_name
             normalized.append(book)
         
         return normalized
@@ -172,45 +414,46 @@ class InterfaceAdapter(ABC):
         if not raw_data:
             return normalized
         
-        # 获取字段映射配置
-        mapping = self.chapters_config.get('field_mapping', {})
-        success_field = mapping.get('success_field', 'status')
-        success_value = mapping.get('success_value', 0)
-        data_path = mapping.get('data_path', 'data.list')
-        
-        # 检查是否成功
-        if raw_data.get(success_field) != success_value:
+        # 检查是否成功（字段映射配置构造时已取出）
+        if raw_data.get(self._chapters_success_field) != self._chapters_success_value:
             return normalized
         
         # 提取章节列表
-        chapter_list = self._get_nested_value(raw_data, data_path)
+        data_keys = self._chapters_data_keys
+        chapter_list = _get_path_value(raw_data, data_keys) if data_keys else None
         if not isinstance(chapter_list, list) or len(chapter_list) == 0:
             return normalized
         
         # 获取书籍信息（从第一个章节）
         first_chapter = chapter_list[0]
-        book_info_map = mapping.get('book_info_fields', {})
-        normalized['book_title'] = self._get_mapped_value(first_chapter, book_info_map.get('book_title', 'bookTitle'))
-        normalized['book_image'] = self._get_mapped_value(first_chapter, book_info_map.get('book_image', 'bookImage'))
-        normalized['book_anchor'] = self._get_mapped_value(first_chapter, book_info_map.get('book_anchor', 'bookHost'))
-        
-        # 处理章节列表
-        chapter_map = mapping.get('chapter_fields', {})
+        for info_key, get_value in self._book_info_getters:
+            normalized[info_key] = get_value(first_chapter)
+        
+        # 处理章节列表（使用构造时生成的取值函数）
+        get_chapter_id, get_title, get_duration, get_order, duration_format = self._chapter_getters
+        chapters = normalized['chapters']
+        # 大多数接口返回的章节已按顺序排列，构建时顺带检查，只有乱序时才排序
+        in_order = True
+        prev_order = None
         for item in chapter_list:
             # 处理时长格式
-            duration_raw = self._get_mapped_value(item, chapter_map.get('duration', 'time'))
-            duration = self._format_duration(duration_raw, chapter_map.get('duration_format', 'auto'))
+            duration = self._format_duration(get_duration(item), duration_format)
             
+            order = int(get_order(item))
             chapter = {
-                'chapter_id': str(self._get_mapped_value(item, chapter_map.get('chapter_id', 'chapterId'))),
-                'title': self._get_mapped_value(item, chapter_map.get('title', 'title')),
+                'chapter_id': str(get_chapter_id(item)),
+                'title': get_title(item),
                 'duration': duration,
-                'order': int(self._get_mapped_value(item, chapter_map.get('order', 'position'), default=0))
+                'order': order
             }
-            normalized['chapters'].append(chapter)
+            chapters.append(chapter)
+            if in_order and prev_order is not None and order < prev_order:
+                in_order = False
+            prev_order = order
         
         # 排序
-        normalized['chapters'].sort(key=lambda x: x['order'])
+        if not in_order:
+            chapters.sort(key=itemgetter('order'))
         
         return normalized
     
@@ -221,17 +464,12 @@ class InterfaceAdapter(ABC):
         if not raw_data:
             return None
         
-        mapping = self.url_config.get('field_mapping', {})
-        success_field = mapping.get('success_field', 'status')
-        success_value = mapping.get('success_value', 0)
-        url_field = mapping.get('url_field', 'src')
-        
-        # 检查是否成功
-        if raw_data.get(success_field) != success_value:
+        # 检查是否成功（字段映射配置构造时已取出）
+        if raw_data.get(self._url_success_field) != self._url_success_value:
             return None
         
         # 提取URL
-        url = self._get_mapped_value(raw_data, url_field)
+        url = self._get_audio_url_value(raw_data)
         return url if url else None
     
     def _get_mapped_value(self, data: Dict, field_path: str, default: Any = '') -> Any:
@@ -240,14 +478,7 @@ class InterfaceAdapter(ABC):
         支持点号分隔的嵌套路径，如 'data.bookTitle'
         如果 field_path 是 'N/A'，直接返回 default
         """
-        if not field_path or field_path == 'N/A':
-            return default
-        
-        result = self._get_nested_value(data, field_path)
-        # 如果结果是 None 或空字符串，返回默认值
-        if result is None or result == '':
-            return default
-        return result
+        return _get_compiled_value(data, _compile_path(field_path), default)
     
     def _get_nested_value(self, data: Dict, path: str) -> Any:
         """
@@ -256,17 +487,7 @@ class InterfaceAdapter(ABC):
         """
         if not path:
             return None
-        
-        keys = path.split('.')
-        value = data
-        for key in keys:
-            if isinstance(value, dict):
-                value = value.get(key)
-            else:
-                return None
-            if value is None:
-                return None
-        return value
+        return _get_path_value(data, _compile_path(path) or (path,))
     
     def _format_duration(self, duration: Any, format_type: str = 'auto') -> str:
         """
@@ -281,11 +502,9 @@ class InterfaceAdapter(ABC):
         
         # 如果是数字，转换为 MM:SS 格式
         try:
-            seconds = int(duration)
-            minutes = seconds // 60
-            secs = seconds % 60
-            return f"{minutes:02d}:{secs:02d}"
-        except (ValueError, TypeError):
+            return _format_seconds(duration)
+        except TypeError:
+            # 不可哈希的值（如列表）无法缓存
             return str(duration)
     
     def _make_request(self, url: str, method: str = 'GET', params: Optional[Dict] = None, 
@@ -315,32 +534,45 @@ class InterfaceAdapter(ABC):
             if method == 'GET':
                 if params:
                     request_kwargs['params'] = params
-                response = requests.get(url, **request_kwargs)
+                response = http_session.get(url, **request_kwargs)
             elif method == 'POST':
                 if json_data:
                     request_kwargs['json'] = json_data
                 elif data:
                     request_kwargs['data'] = data
-                response = requests.post(url, **request_kwargs)
+                response = http_session.post(url, **request_kwargs)
             elif method == 'PUT':
                 if json_data:
                     request_kwargs['json'] = json_data
                 elif data:
                     request_kwargs['data'] = data
-                response = requests.put(url, **request_kwargs)
+                response = http_session.put(url, **request_kwargs)
             elif method == 'DELETE':
-                response = requests.delete(url, **request_kwargs)
+                response = http_session.delete(url, **request_kwargs)
             else:
                 # 默认使用GET
-                response = requests.get(url, **request_kwargs)
+                response = http_session.get(url, **request_kwargs)
+            
+            retries = getattr(response.raw, 'retries', None)
+            if retries is not None and retries.history:
+                logger.debug("%s接口请求重试 %d 次 (%s %s)", self.interface_name, len(retries.history), method, url)
             
             response.raise_for_status()
-            return response.json()
+            return _parse_json(response)
+        except requests.exceptions.Timeout as e:
+            logger.warning("%s接口请求超时 (%s %s): %s", self.interface_name, method, url, e)
+            return None
+        except requests.exceptions.ConnectionError as e:
+            logger.warning("%s接口连接失败 (%s %s): %s", self.interface_name, method, url, e)
+            return None
+        except requests.exceptions.HTTPError as e:
+            logger.warning("%s接口返回错误状态 (%s %s): %s", self.interface_name, method, url, e)
+            return None
         except requests.exceptions.RequestException as e:
-            print(f"{self.interface_name}接口请求失败 ({method} {url}): {e}")
+            logger.warning("%s接口请求失败 (%s %s): %s", self.interface_name, method, url, e)
             return None
         except ValueError as e:
-            print(f"{self.interface_name}接口响应解析失败: {e}")
+            logger.warning("%s接口响应解析失败: %s", self.interface_name, e)
             return None
 
 
@@ -349,31 +581,24 @@ class ConfigBasedAdapter(InterfaceAdapter):
     
     def search_books(self, keyword: str) -> Optional[Dict]:
         """搜索书籍"""
-        import urllib.parse
-        encoded_keyword = urllib.parse.quote(keyword)
-        
-        # 支持 url 和 _url 两种键名
-        url_template = self.search_config.get('url', '') or self.search_config.get('_url', '')
+        # 支持 url 和 _url 两种键名（构造时已取出）
+        url_template = self._search_url_template
         if not url_template:
             return None
         
         # 获取HTTP方法（默认GET）
         method = self.search_config.get('method', 'GET').upper()
         
-        # 获取请求头配置
-        headers = self.search_config.get('headers', {})
-        if isinstance(headers, str):
-            try:
-                headers = json.loads(headers)
-            except:
-                headers = {}
+        # 获取请求头配置（构造时已解析）
+        headers = self._search_headers
         
-        url = url_template.replace('{keyword}', encoded_keyword)
+        # 只有模板中含 {keyword} 时才编码关键词
+        if 'keyword' in self._search_url_placeholders:
+            url = _fill_placeholders(url_template, {'keyword': quote(keyword)})
+        else:
+            url = url_template
         
-        print(f"=== {self.interface_name}接口搜索调试信息 ===")
-        print(f"搜索关键词: {keyword}")
-        print(f"请求方法: {method}")
-        print(f"请求URL: {url}")
+        logger.debug("%s接口搜索: keyword=%s, method=%s, url=%s", self.interface_name, keyword, method, url)
         
         # 根据方法类型处理参数
         if method == 'GET':
@@ -384,8 +609,8 @@ class ConfigBasedAdapter(InterfaceAdapter):
             if post_data_config.get('type') == 'json':
                 json_data = post_data_config.get('data', {})
                 # 替换占位符
-                json_data_str = json.dumps(json_data).replace('{keyword}', keyword)
-                json_data = json.loads(json_data_str)
+                if self._search_body_placeholders:
+                    json_data = _fill_json_placeholders(json_data, {'keyword': keyword})
                 result = self._make_request(url, method=method, json_data=json_data, headers=headers)
             else:
                 # 表单数据
@@ -398,44 +623,34 @@ class ConfigBasedAdapter(InterfaceAdapter):
             result = self._make_request(url, method=method, headers=headers)
         
         if result:
-            print(f"响应状态码: 200")
-            print(f"响应内容: {json.dumps(result, ensure_ascii=False)[:200]}...")
+            # 响应内容只在实际输出日志时才格式化
+            logger.debug("%s接口搜索响应: %.200s...", self.interface_name, result)
         
         return result
     
     def get_chapters(self, book_id: str, page: int = 1, size: int = 50) -> Optional[Dict]:
         """获取章节列表"""
-        # 支持 url 和 _url 两种键名
-        url_template = self.chapters_config.get('url', '') or self.chapters_config.get('_url', '')
+        # 支持 url 和 _url 两种键名（构造时已取出）
+        url_template = self._chapters_url_template
         if not url_template:
             return None
         
         # 获取HTTP方法（默认GET）
         method = self.chapters_config.get('method', 'GET').upper()
         
-        # 获取请求头配置
-        headers = self.chapters_config.get('headers', {})
-        if isinstance(headers, str):
-            try:
-                headers = json.loads(headers)
-            except:
-                headers = {}
-        
-        # 替换占位符
-        url = url_template
-        url = url.replace('{bookId}', str(book_id))
-        url = url.replace('{page}', str(page))
-        url = url.replace('{size}', str(size))
+        # 获取请求头配置（构造时已解析）
+        headers = self._chapters_headers
         
+        # 替换占位符（一次扫描）
+        values = {'bookId': str(book_id), 'page': str(page), 'size': str(size)}
+        url_values = values
         # 如果需要时间戳
-        if '{timestamp}' in url:
-            timestamp = int(datetime.now().timestamp() * 1000)
-            url = url.replace('{timestamp}', str(timestamp))
+        if 'timestamp' in self._chapters_url_placeholders:
+            url_values = dict(values, timestamp=str(int(datetime.now().timestamp() * 1000)))
+        url = _fill_placeholders(url_template, url_values)
         
-        print(f"=== {self.interface_name}接口章节列表调试信息 ===")
-        print(f"请求方法: {method}")
-        print(f"请求参数: book_id={book_id}, page={page}, size={size}")
-        print(f"请求URL: {url}")
+        logger.debug("%s接口章节列表: book_id=%s, page=%s, size=%s, method=%s, url=%s",
+                     self.interface_name, book_id, page, size, method, url)
         
         # 根据方法类型处理参数
         if method == 'GET':
@@ -445,21 +660,16 @@ class ConfigBasedAdapter(InterfaceAdapter):
             if post_data_config.get('type') == 'json':
                 json_data = post_data_config.get('data', {})
                 # 替换占位符
-                json_data_str = json.dumps(json_data)\
-                    .replace('{bookId}', str(book_id))\
-                    .replace('{page}', str(page))\
-                    .replace('{size}', str(size))
-                if '{timestamp}' in json_data_str:
-                    timestamp = int(datetime.now().timestamp() * 1000)
-                    json_data_str = json_data_str.replace('{timestamp}', str(timestamp))
-                json_data = json.loads(json_data_str)
+                body_placeholders = self._chapters_body_placeholders
+                if body_placeholders:
+                    body_values = values
+                    if 'timestamp' in body_placeholders:
+                        body_values = dict(values, timestamp=str(int(datetime.now().timestamp() * 1000)))
+                    json_data = _fill_json_placeholders(json_data, body_values)
                 result = self._make_request(url, method=method, json_data=json_data, headers=headers)
             else:
                 form_data = post_data_config.get('data', {})
-                form_data = {k: str(v).replace('{bookId}', str(book_id))
-                            .replace('{page}', str(page))
-                            .replace('{size}', str(size))
-                            if isinstance(v, str) else v 
+                form_data = {k: _fill_placeholders(v, values) if isinstance(v, str) else v
                             for k, v in form_data.items()}
                 result = self._make_request(url, method=method, data=form_data, headers=headers)
         else:
@@ -474,40 +684,32 @@ class ConfigBasedAdapter(InterfaceAdapter):
     
     def get_audio_url(self, book_id: Optional[str], chapter_id: str) -> Optional[str]:
         """获取音频URL"""
-        # 支持 url 和 _url 两种键名
-        url_template = self.url_config.get('url', '') or self.url_config.get('_url', '')
+        # 支持 url 和 _url 两种键名（构造时已取出）
+        url_template = self._url_url_template
         if not url_template:
             return None
         
         # 获取HTTP方法（默认GET）
         method = self.url_config.get('method', 'GET').upper()
         
-        # 获取请求头配置
-        headers = self.url_config.get('headers', {})
-        if isinstance(headers, str):
-            try:
-                headers = json.loads(headers)
-            except:
-                headers = {}
-        
-        # 替换占位符
-        url = url_template
-        if '{bookId}' in url:
-            if not book_id:
-                return None
-            url = url.replace('{bookId}', str(book_id))
-        if '{chapterId}' in url:
-            url = url.replace('{chapterId}', str(chapter_id))
-        if '{trackId}' in url:
-            url = url.replace('{trackId}', str(chapter_id))
-        if '{timestamp}' in url:
+        # 获取请求头配置（构造时已解析）
+        headers = self._url_headers
+        
+        # 替换占位符（一次扫描）
+        placeholders = self._url_url_placeholders
+        if 'bookId' in placeholders and not book_id:
+            return None
+        values = {'chapterId': str(chapter_id), 'trackId': str(chapter_id)}
+        if book_id:
+            values['bookId'] = str(book_id)
+        url_values = values
+        if 'timestamp' in placeholders:
             timestamp = self.url_config.get('timestamp', 1765629405658)  # 默认时间戳或配置中的时间戳
-            url = url.replace('{timestamp}', str(timestamp))
+            url_values = dict(values, timestamp=str(timestamp))
+        url = _fill_placeholders(url_template, url_values)
         
-        print(f"=== {self.interface_name}接口音频URL调试信息 ===")
-        print(f"请求方法: {method}")
-        print(f"请求参数: book_id={book_id}, chapter_id={chapter_id}")
-        print(f"请求URL: {url}")
+        logger.debug("%s接口音频URL: book_id=%s, chapter_id=%s, method=%s, url=%s",
+                     self.interface_name, book_id, chapter_id, method, url)
         
         # 根据方法类型处理参数
         if method == 'GET':
@@ -517,26 +719,17 @@ class ConfigBasedAdapter(InterfaceAdapter):
             if post_data_config.get('type') == 'json':
                 json_data = post_data_config.get('data', {})
                 # 替换占位符
-                json_data_str = json.dumps(json_data)
-                if book_id:
-                    json_data_str = json_data_str.replace('{bookId}', str(book_id))
-                json_data_str = json_data_str.replace('{chapterId}', str(chapter_id))\
-                    .replace('{trackId}', str(chapter_id))
-                if '{timestamp}' in json_data_str:
-                    timestamp = self.url_config.get('timestamp', 1765629405658)
-                    json_data_str = json_data_str.replace('{timestamp}', str(timestamp))
-                json_data = json.loads(json_data_str)
+                body_placeholders = self._url_body_placeholders
+                if body_placeholders:
+                    body_values = values
+                    if 'timestamp' in body_placeholders:
+                        body_values = dict(values, timestamp=str(self.url_config.get('timestamp', 1765629405658)))
+                    json_data = _fill_json_placeholders(json_data, body_values)
                 result = self._make_request(url, method=method, json_data=json_data, headers=headers)
             else:
                 form_data = post_data_config.get('data', {})
-                form_data = {k: str(v).replace('{chapterId}', str(chapter_id))
-                            .replace('{trackId}', str(chapter_id))
-                            if isinstance(v, str) else v 
+                form_data = {k: _fill_placeholders(v, values) if isinstance(v, str) else v
                             for k, v in form_data.items()}
-                if book_id:
-                    form_data = {k: str(v).replace('{bookId}', str(book_id)) 
-                                if isinstance(v, str) else v 
-                                for k, v in form_data.items()}
                 result = self._make_request(url, method=method, data=form_data, headers=headers)
         else:
             result = self._make_request(url, method=method, headers=headers)
@@ -544,9 +737,9 @@ class ConfigBasedAdapter(InterfaceAdapter):
         if result:
             audio_url = self.extract_audio_url(result)
             if audio_url:
-                print(f"成功获取音频地址: {audio_url}")
+                logger.debug("%s接口成功获取音频地址: %s", self.interface_name, audio_url)
             else:
-                print(f"未能从响应中提取音频URL")
+                logger.warning("%s接口未能从响应中提取音频URL", self.interface_name)
             return audio_url
         
         return None
\ No newline at end of file
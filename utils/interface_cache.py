@@ -0,0 +1,71 @@
+"""
+接口列表缓存
+接口定义很少变动，但首页、搜索结果页每次请求都要读取启用的接口列表，
+详情页、播放页的路由也要校验接口名是否存在，
+这里在进程内缓存一段时间，后台修改接口定义时主动失效
+（多worker部署时其他进程依靠TTL过期刷新）
+"""
+import time
+import threading
+from sqlalchemy.orm import load_only
+from models.database import InterfaceDefinition
+
+# 缓存有效期（秒）
+ENABLED_INTERFACES_TTL = 30
+
+_cache = {'value': None, 'expires': 0}
+_lock = threading.Lock()
+
+
+def _load_interfaces():
+    """
+    从数据库读取所有接口定义（只加载需要的列，不读取字段映射JSON）
+    :return: (启用的接口列表, 全部接口名集合)
+    """
+    definitions = InterfaceDefinition.query.options(load_only(
+        InterfaceDefinition.interface_name,
+        InterfaceDefinition.display_name,
+        InterfaceDefinition.description,
+        InterfaceDefinition.enabled
+    )).all()
+    enabled = tuple({
+        'interface_name': definition.interface_name,
+        'display_name': definition.display_name,
+        'description': definition.description
+    } for definition in definitions if definition.enabled)
+    names = frozenset(definition.interface_name for definition in definitions)
+    return enabled, names
+
+
+def _get_cached():
+    value = _cache['value']
+    if value is not None and time.monotonic() < _cache['expires']:
+        return value
+
+    with _lock:
+        # 等锁期间可能已被其他线程刷新
+        if _cache['value'] is not None and time.monotonic() < _cache['expires']:
+            return _cache['value']
+        value = _load_interfaces()
+        _cache['value'] = value
+        _cache['expires'] = time.monotonic() + ENABLED_INTERFACES_TTL
+        return value
+
+
+def get_enabled_interfaces():
+    """
+    获取启用的接口列表
+    :return: tuple[dict]，进程内共享，调用方不要修改
+    """
+    return _get_cached()[0]
+
+
+def get_interface_names():
+    """获取所有已定义的接口名（包括已禁用的，书架中的旧书仍可访问）"""
+    return _get_cached()[1]
+
+
+def invalidate_enabled_interfaces():
+    """接口定义变更后清空缓存"""
+    _cache['value'] = None
+    _cache['expires'] = 0
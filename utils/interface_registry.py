@@ -2,53 +2,64 @@
 接口注册器 - 管理所有接口适配器
 支持动态注册、加载和获取接口适配器
 """
+import threading
+import time
 from typing import Dict, Optional
 from utils.interface_adapter import ConfigBasedAdapter, InterfaceAdapter
-from utils.api_config import get_api_config
-import json
+from utils.api_config import get_api_configs, get_api_configs_for_interfaces
+from utils.logger import get_logger
+
+logger = get_logger('interface_registry')
+
+# 数据库中不存在的接口名缓存时间（秒），避免每次请求都查询数据库
+NEGATIVE_CACHE_TTL = 30
 
 
 class InterfaceRegistry:
-    """接口注册器（单例模式）"""
-    
-    _instance = None
-    _adapters: Dict[str, InterfaceAdapter] = {}
-    _initialized = False
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(InterfaceRegistry, cls).__new__(cls)
-        return cls._instance
+    """接口注册器（通过模块级实例 registry 使用）"""
     
     def __init__(self):
-        if not self._initialized:
-            self._adapters = {}
-            self._initialized = True
+        self._adapters: Dict[str, InterfaceAdapter] = {}
+        # 数据库中不存在的接口名 -> 过期时间
+        self._negative_cache: Dict[str, float] = {}
+        # 保护 _adapters 的修改；读取已存在的适配器不加锁
+        self._lock = threading.RLock()
     
     def register(self, interface_name: str, adapter: InterfaceAdapter):
         """注册接口适配器"""
-        self._adapters[interface_name] = adapter
-        print(f"接口适配器已注册: {interface_name}")
+        with self._lock:
+            self._adapters[interface_name] = adapter
+            self._negative_cache.pop(interface_name, None)
+        logger.info('接口适配器已注册: %s', interface_name)
     
     def get_adapter(self, interface_name: str) -> Optional[InterfaceAdapter]:
         """获取接口适配器"""
-        # 如果适配器已存在，直接返回
-        if interface_name in self._adapters:
-            return self._adapters[interface_name]
+        # 如果适配器已存在，直接返回（无锁快速路径）
+        adapter = self._adapters.get(interface_name)
+        if adapter is not None:
+            return adapter
+        
+        # 最近确认过不存在的接口，直接返回
+        expires = self._negative_cache.get(interface_name)
+        if expires is not None and time.monotonic() < expires:
+            return None
         
         # 否则尝试从数据库加载配置并创建适配器
-        adapter = self._load_adapter_from_db(interface_name)
-        if adapter:
-            self._adapters[interface_name] = adapter
+        with self._lock:
+            # 等锁期间可能已被其他线程加载
+            adapter = self._adapters.get(interface_name)
+            if adapter is None:
+                adapter = self._load_adapter_from_db(interface_name)
+                if adapter is not None:
+                    self._adapters[interface_name] = adapter
             return adapter
-        
-        return None
     
     def unregister(self, interface_name: str):
         """注销接口适配器"""
-        if interface_name in self._adapters:
-            del self._adapters[interface_name]
-            print(f"接口适配器已注销: {interface_name}")
+        with self._lock:
+            self._negative_cache.pop(interface_name, None)
+            if self._adapters.pop(interface_name, None) is not None:
+                logger.info('接口适配器已注销: %s', interface_name)
     
     def list_interfaces(self) -> list:
         """列出所有已注册的接口"""
@@ -68,65 +79,97 @@ class InterfaceRegistry:
             ).first()
             
             if not interface_def:
+                self._negative_cache[interface_name] = time.monotonic() + NEGATIVE_CACHE_TTL
                 return None
             
-            # 获取各类型的URL配置
-            search_config = get_api_config(interface_name, 'search')
-            chapters_config = get_api_config(interface_name, 'chapters')
-            url_config = get_api_config(interface_name, 'url')
+            # 获取各类型的URL配置（一次查询）
+            configs = get_api_configs(interface_name)
+            return self._create_adapter(interface_def, configs)
             
+        except Exception:
+            logger.exception('加载接口适配器失败 (%s)', interface_name)
+            return None
+    
+    def _create_adapter(self, interface_def, configs: Dict[str, Dict]) -> InterfaceAdapter:
+        """根据接口定义和各类型的URL配置创建适配器"""
+        interface_name = interface_def.interface_name
+        search_config = configs['search']
+        chapters_config = configs['chapters']
+        url_config = configs['url']
+        
+        # 字段映射为JSON列，读取时已解析为dict
+        field_mapping = interface_def.field_mapping
+        if not isinstance(field_mapping, dict):
+            if field_mapping:
+                logger.warning('[%s] 字段映射格式错误，使用默认配置', interface_name)
             field_mapping = {}
-            if interface_def and interface_def.field_mapping:
-                # 如果数据库中有字段映射配置，使用数据库的
+        
+        # 合并字段映射配置到URL配置中
+        if 'search' in field_mapping:
+            search_config['field_mapping'] = field_mapping['search']
+        if 'chapters' in field_mapping:
+            chapters_config['field_mapping'] = field_mapping['chapters']
+        if 'url' in field_mapping:
+            url_config['field_mapping'] = field_mapping['url']
+        
+        # 创建适配器配置
+        adapter_config = {
+            'search': search_config,
+            'chapters': chapters_config,
+            'url': url_config
+        }
+        
+        return ConfigBasedAdapter(interface_name, adapter_config)
+    
+    def _load_adapters_from_db(self, interface_names: list) -> Dict[str, InterfaceAdapter]:
+        """
+        批量加载多个接口的适配器
+        接口定义和URL配置各一次查询，而不是每个接口分别查询
+        """
+        from models.database import InterfaceDefinition
+        
+        adapters = {}
+        if not interface_names:
+            return adapters
+        try:
+            definitions = InterfaceDefinition.query.filter(
+                InterfaceDefinition.interface_name.in_(interface_names)
+            ).all()
+            all_configs = get_api_configs_for_interfaces([d.interface_name for d in definitions])
+            for interface_def in definitions:
                 try:
-                    field_mapping = json.loads(interface_def.field_mapping)
-                except:
-                    print(f"[{interface_name}] 字段映射JSON解析失败，使用默认配置")
-                    field_mapping = {}
-            
-            # 合并字段映射配置到URL配置中
-            if 'search' in field_mapping:
-                search_config['field_mapping'] = field_mapping['search']
-            if 'chapters' in field_mapping:
-                chapters_config['field_mapping'] = field_mapping['chapters']
-            if 'url' in field_mapping:
-                url_config['field_mapping'] = field_mapping['url']
-            
-            # 创建适配器配置
-            adapter_config = {
-                'search': search_config,
-                'chapters': chapters_config,
-                'url': url_config
-            }
-            
-            # 创建适配器
-            adapter = ConfigBasedAdapter(interface_name, adapter_config)
-            return adapter
-            
-        except Exception as e:
-            print(f"加载接口适配器失败 ({interface_name}): {e}")
-            import traceback
-            traceback.print_exc()
-            return None
+                    adapters[interface_def.interface_name] = self._create_adapter(
+                        interface_def, all_configs[interface_def.interface_name]
+                    )
+                except Exception:
+                    logger.exception('加载接口适配器失败 (%s)', interface_def.interface_name)
+        except Exception:
+            logger.exception('批量加载接口适配器失败')
+        return adapters
     
     def reload(self, interface_name: Optional[str] = None):
         """
         重新加载接口适配器
         如果指定了 interface_name，只重新加载该接口；否则重新加载所有接口
         """
-        if interface_name:
-            if interface_name in self._adapters:
-                del self._adapters[interface_name]
-            self.get_adapter(interface_name)  # 这会触发重新加载
-        else:
-            # 重新加载所有接口
-            interface_names = list(self._adapters.keys())
-            self._adapters.clear()
-            for name in interface_names:
-                self.get_adapter(name)
+        # 先加载新的适配器再替换，并发读取时不会拿到空缺的条目
+        with self._lock:
+            if interface_name:
+                self._negative_cache.pop(interface_name, None)
+                adapter = self._load_adapter_from_db(interface_name)
+                if adapter is not None:
+                    self._adapters[interface_name] = adapter
+                else:
+                    self._adapters.pop(interface_name, None)
+            else:
+                # 重新加载所有接口（批量查询）
+                self._negative_cache.clear()
+                adapters = self._load_adapters_from_db(list(self._adapters.keys()))
+                self._adapters.clear()
+                self._adapters.update(adapters)
 
 
-# 全局注册器实例
+# 全局注册器实例（进程内唯一）
 registry = InterfaceRegistry()
 
 
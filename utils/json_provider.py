@@ -0,0 +1,37 @@
+"""
+基于 orjson 的 Flask JSON 序列化
+orjson 在 C 层直接序列化 dict/list/datetime，比标准库 json 快得多
+未安装 orjson 时保持 Flask 默认实现
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# 非字符串键（如 int）也允许序列化，与标准库 json 行为一致
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """使用 orjson 的 JSON Provider，jsonify / request.get_json 都会走这里"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS),
+            mimetype=self.mimetype
+        )
+
+
+def init_json_provider(app):
+    """为应用启用 orjson 序列化（未安装 orjson 时跳过）"""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
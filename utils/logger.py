@@ -2,9 +2,12 @@
 统一的日志配置模块
 支持控制台输出、文件记录和日志轮转
 """
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from pathlib import Path
 
 # 日志目录
@@ -15,6 +18,55 @@ LOG_DIR.mkdir(exist_ok=True)
 LOG_FORMAT = '[%(asctime)s] [%(levelname)s] [%(name)s:%(lineno)d] - %(message)s'
 DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
+
+class ProcessQueueHandler(QueueHandler):
+    """按进程懒启动后台写入线程的 QueueHandler
+
+    uwsgi master 预加载、gunicorn --preload 等场景下，worker 由 fork 得到，
+    会继承 handler 但不会继承写入线程，因此在每个进程首次写日志时再启动
+    """
+
+    def __init__(self, handlers):
+        # SimpleQueue 为C实现的无界队列，入队开销比 queue.Queue 小
+        super().__init__(queue.SimpleQueue())
+        self._target_handlers = handlers
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._listener is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._listener is not None and self._pid == os.getpid():
+                return
+            # fork 继承来的队列里可能还有父进程未写出的记录，子进程换用新队列避免重复写
+            if self._pid is not None:
+                self.queue = queue.SimpleQueue()
+            self._listener = QueueListener(self.queue, *self._target_handlers, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def enqueue(self, record):
+        self._ensure_started()
+        super().enqueue(record)
+
+    def stop_listener(self):
+        """停止当前进程的写入线程并写完剩余日志"""
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+
+
+# 所有日志记录器的队列 handler，进程退出时统一停止后台线程并写完剩余日志
+_queue_handlers = []
+
+def _stop_listeners():
+    for handler in _queue_handlers:
+        handler.stop_listener()
+
+atexit.register(_stop_listeners)
+
 def setup_logger(name='app', level=logging.INFO, log_file='app.log', max_bytes=10*1024*1024, backup_count=5):
     """
     配置日志记录器
@@ -45,7 +97,7 @@ def setup_logger(name='app', level=logging.INFO, log_file='app.log', max_bytes=1
     console_handler = logging.StreamHandler()
     console_handler.setLevel(level)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers = [console_handler]
     
     # 文件处理器（带轮转）
     if log_file:
@@ -58,7 +110,13 @@ def setup_logger(name='app', level=logging.INFO, log_file='app.log', max_bytes=1
         )
         file_handler.setLevel(level)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+    
+    # 请求线程只把日志放入队列，由后台线程写控制台和文件，避免磁盘IO阻塞请求
+    queue_handler = ProcessQueueHandler(handlers)
+    queue_handler.setLevel(level)
+    logger.addHandler(queue_handler)
+    _queue_handlers.append(queue_handler)
     
     return logger
 
@@ -108,15 +166,14 @@ def log_api_request(logger, request, extra_info=None):
         request: Flask request对象
         extra_info: 额外信息字典
     """
+    # X-Forwarded-For 已由 ProxyFix 解析到 remote_addr
     ip = request.remote_addr
-    if request.headers.get('X-Forwarded-For'):
-        ip = request.headers.get('X-Forwarded-For').split(',')[0].strip()
     
-    log_msg = f"API请求 {request.method} {request.path} from {ip}"
+    # 使用 % 参数，日志级别被过滤时不做字符串格式化
     if extra_info:
-        log_msg += f" | {extra_info}"
-    
-    logger.info(log_msg)
+        logger.info("API请求 %s %s from %s | %s", request.method, request.path, ip, extra_info)
+    else:
+        logger.info("API请求 %s %s from %s", request.method, request.path, ip)
 
 def log_db_operation(logger, operation, table, extra_info=None):
     """
@@ -128,11 +185,10 @@ def log_db_operation(logger, operation, table, extra_info=None):
         table: 表名
         extra_info: 额外信息
     """
-    log_msg = f"数据库操作 {operation} {table}"
     if extra_info:
-        log_msg += f" | {extra_info}"
-    
-    logger.debug(log_msg)
+        logger.debug("数据库操作 %s %s | %s", operation, table, extra_info)
+    else:
+        logger.debug("数据库操作 %s %s", operation, table)
 
 def log_error_with_context(logger, error, context=None):
     """
@@ -143,8 +199,7 @@ def log_error_with_context(logger, error, context=None):
         error: 异常对象
         context: 上下文信息字典
     """
-    error_msg = f"错误: {type(error).__name__}: {str(error)}"
     if context:
-        error_msg += f" | 上下文: {context}"
-    
-    logger.error(error_msg, exc_info=True)
+        logger.error("错误: %s: %s | 上下文: %s", type(error).__name__, error, context, exc_info=True)
+    else:
+        logger.error("错误: %s: %s", type(error).__name__, error, exc_info=True)
@@ -1,55 +1,82 @@
+from functools import lru_cache
+from operator import itemgetter
+from utils.interface_registry import get_interface_adapter
+
+# 旧接口的书籍字段表：(输出字段, 原始字段, 默认值)，原始字段为 None 时直接使用默认值
+_LAM_BOOK_FIELDS = (
+    ('id', 'id', ''),
+    ('bookTitle', 'bookTitle', ''),
+    ('bookName', 'bookName', ''),
+    ('bookAnchor', 'bookAnchor', ''),
+    ('bookImage', 'bookImage', ''),
+    ('bookDesc', 'bookDesc', ''),
+    ('count', 'count', 'N/A'),
+    ('heat', 'heat', 'N/A'),
+    ('interface', None, 'lam'),  # 添加接口标识
+)
+
+_TT_BOOK_FIELDS = (
+    ('id', 'albumId', ''),  # 使用albumId作为id
+    ('bookTitle', 'title', ''),
+    ('bookName', None, 'N/A'),  # tt接口没有作者信息
+    ('bookAnchor', 'Nickname', ''),
+    ('bookImage', 'cover', ''),
+    ('bookDesc', 'intro', ''),
+    ('count', None, 'N/A'),  # tt接口没有章节数信息
+    ('heat', None, 'N/A'),  # tt接口没有热度信息
+    ('interface', None, 'tt'),  # 添加接口标识
+)
+
+
+@lru_cache(maxsize=4096)
+def _format_mmss(seconds):
+    """秒数转换为 MM:SS（同一专辑的章节时长大量重复，缓存结果）"""
+    minutes, seconds = divmod(seconds, 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+def _sort_chapters(chapters):
+    """按顺序号排序章节；接口返回的章节通常已经有序，先线性检查，乱序时才排序"""
+    orders = [chapter['order'] for chapter in chapters]
+    if any(current < previous for previous, current in zip(orders, orders[1:])):
+        chapters.sort(key=itemgetter('order'))
+
+
+def _map_books(items, fields):
+    """按字段表转换书籍列表"""
+    return [
+        {out_key: default if in_key is None else item.get(in_key, default) for out_key, in_key, default in fields}
+        for item in items
+    ]
+
+
 def normalize_book_data(raw_data, interface):
     """
     标准化书籍数据
     优先使用适配器，如果没有适配器则使用硬编码逻辑（向后兼容）
     """
     # 尝试使用适配器
-    from utils.interface_registry import get_interface_adapter
     adapter = get_interface_adapter(interface)
     if adapter:
         return adapter.normalize_book_data(raw_data)
     
     # 兼容旧代码（硬编码逻辑）
-    normalized = []
-    
     # 确保raw_data不是None
     if not raw_data:
-        return normalized
+        return []
     
     if interface == 'lam' and raw_data.get('status') == 0:
         # 处理lam接口数据
-        book_data = raw_data.get('data', {}).get('bookData', [])
+        book_data = (raw_data.get('data') or {}).get('bookData')
         if isinstance(book_data, list):
-            for item in book_data:
-                normalized.append({
-                    'id': item.get('id', ''),
-                    'bookTitle': item.get('bookTitle', ''),
-                    'bookName': item.get('bookName', ''),
-                    'bookAnchor': item.get('bookAnchor', ''),
-                    'bookImage': item.get('bookImage', ''),
-                    'bookDesc': item.get('bookDesc', ''),
-                    'count': item.get('count', 'N/A'),
-                    'heat': item.get('heat', 'N/A'),
-                    'interface': 'lam'  # 添加接口标识
-                })
+            return _map_books(book_data, _LAM_BOOK_FIELDS)
     elif interface == 'tt':
         # 处理tt接口数据
         tt_data = raw_data.get('data', [])
         if isinstance(tt_data, list):
-            for item in tt_data:
-                normalized.append({
-                    'id': item.get('albumId', ''),  # 使用albumId作为id
-                    'bookTitle': item.get('title', ''),
-                    'bookName': 'N/A',  # tt接口没有作者信息
-                    'bookAnchor': item.get('Nickname', ''),
-                    'bookImage': item.get('cover', ''),
-                    'bookDesc': item.get('intro', ''),
-                    'count': 'N/A',  # tt接口没有章节数信息
-                    'heat': 'N/A',  # tt接口没有热度信息
-                    'interface': 'tt'  # 添加接口标识
-                })
+            return _map_books(tt_data, _TT_BOOK_FIELDS)
     
-    return normalized
+    return []
 
 def normalize_chapter_data(raw_data, interface):
     """
@@ -57,7 +84,6 @@ def normalize_chapter_data(raw_data, interface):
     优先使用适配器，如果没有适配器则使用硬编码逻辑（向后兼容）
     """
     # 尝试使用适配器
-    from utils.interface_registry import get_interface_adapter
     adapter = get_interface_adapter(interface)
     if adapter:
         return adapter.normalize_chapter_data(raw_data)
@@ -73,16 +99,17 @@ def normalize_chapter_data(raw_data, interface):
     
     if interface == 'lam' and raw_data and raw_data.get('status') == 0:
         # 处理lam接口数据
-        if raw_data.get('data', {}).get('list', []):
+        chapter_list = (raw_data.get('data') or {}).get('list')
+        if chapter_list:
             # 获取书籍信息（从第一个章节中）
-            first_chapter = raw_data['data']['list'][0]
+            first_chapter = chapter_list[0]
             normalized['book_title'] = first_chapter.get('bookTitle', '')
             normalized['book_image'] = first_chapter.get('bookImage', '')
             normalized['book_author'] = ''  # lam接口没有作者信息
             normalized['book_anchor'] = first_chapter.get('bookHost', '')
             
             # 处理章节列表
-            for item in raw_data['data']['list']:
+            for item in chapter_list:
                 normalized['chapters'].append({
                     'chapter_id': item.get('chapterId', ''),
                     'title': item.get('title', ''),
@@ -91,21 +118,19 @@ def normalize_chapter_data(raw_data, interface):
                 })
     elif interface == 'tt' and raw_data and raw_data.get('ret') == 0:
         # 处理tt接口数据
-        if raw_data.get('data', {}).get('list', []):
+        chapter_list = (raw_data.get('data') or {}).get('list')
+        if chapter_list:
             # 获取书籍信息（从第一个章节中）
-            first_chapter = raw_data['data']['list'][0]
+            first_chapter = chapter_list[0]
             normalized['book_title'] = first_chapter.get('albumTitle', '')
             normalized['book_image'] = first_chapter.get('coverLarge', '')
             normalized['book_author'] = ''  # tt接口没有作者信息
             normalized['book_anchor'] = first_chapter.get('nickname', '')
             
             # 处理章节列表
-            for item in raw_data['data']['list']:
+            for item in chapter_list:
                 # 转换时长（秒 -> MM:SS）
-                seconds = item.get('duration', 0)
-                minutes = seconds // 60
-                seconds = seconds % 60
-                duration = f"{minutes:02d}:{seconds:02d}"
+                duration = _format_mmss(item.get('duration', 0) or 0)
                 
                 normalized['chapters'].append({
                     'chapter_id': item.get('trackId', ''),
@@ -115,6 +140,6 @@ def normalize_chapter_data(raw_data, interface):
                 })
     
     # 对章节列表进行排序，确保章节顺序正确
-    normalized['chapters'].sort(key=lambda x: x['order'])
+    _sort_chapters(normalized['chapters'])
     
     return normalized
\ No newline at end of file
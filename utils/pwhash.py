@@ -0,0 +1,54 @@
+"""
+密码哈希工具
+werkzeug 的 pbkdf2 实现内部直接调用 hashlib.pbkdf2_hmac（OpenSSL C 实现），无需自行实现
+这里统一所有入口的哈希方法：后台创建用户原先使用 werkzeug 默认的 scrypt，
+每次登录校验都要分配约 32MB 内存，比注册用户的 pbkdf2 慢得多
+
+哈希计算放到独立的系统线程中执行（hashlib 计算期间会释放 GIL），
+避免阻塞处理请求的 worker：
+- gevent worker 下 threading 已被 monkey patch，普通线程池实际是协程，
+  因此使用 gevent hub 自带的原生线程池，等待期间当前协程让出
+- 其他 worker（sync/gthread）使用 ThreadPoolExecutor
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# 与历史注册用户保持一致的哈希方法
+PASSWORD_HASH_METHOD = 'pbkdf2:sha256:260000'
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _use_gevent_threadpool():
+    """当前进程是否已被 gevent monkey patch"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
+
+
+def _run_in_pool(func, *args):
+    """在系统线程中执行哈希计算并等待结果"""
+    global _pool
+    if _use_gevent_threadpool():
+        import gevent
+        return gevent.get_hub().threadpool.apply(func, args)
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='pwhash')
+    return _pool.submit(func, *args).result()
+
+
+def hash_password(password):
+    """生成密码哈希"""
+    return _run_in_pool(generate_password_hash, password, PASSWORD_HASH_METHOD)
+
+
+def verify_password(stored_hash, password):
+    """校验密码（兼容已存储的 scrypt / pbkdf2 等各种 werkzeug 格式）"""
+    return _run_in_pool(check_password_hash, stored_hash, password)
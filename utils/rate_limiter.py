@@ -5,49 +5,108 @@
 """
 from flask import request, jsonify
 from functools import wraps
-from collections import defaultdict
+from collections import deque
+from itertools import islice
 from datetime import datetime, timedelta
+import os
+import threading
 import time
 from utils.logger import get_logger
+from utils.client_ip import get_client_ip
 
 logger = get_logger('rate_limiter')
 
+# 每次请求最多检查的过期key数量，清理分摊到多个请求中，避免单个请求遍历全部key
+CLEANUP_BATCH_SIZE = 256
+
+# 按key分片的锁数量（2的幂），不同IP的请求大多落在不同的锁上
+LOCK_SHARDS = 64
+
+# 最多记录的key数量；大量不同IP涌入时淘汰最早出现的key，限制内存占用
+# （每个key的记录数不会超过 limit，无需再限制单个队列长度）
+MAX_KEYS = 100000
+
+# 是否在正常响应中附加 X-RateLimit-* 响应头（前端未使用，默认关闭；429 响应始终携带）
+RATE_LIMIT_EXPOSE_HEADERS = os.environ.get('RATE_LIMIT_EXPOSE_HEADERS') == '1'
+
 class RateLimiter:
     """
     基于内存的简单频率限制器
     """
     def __init__(self):
-        # 存储格式：{key: [(timestamp1, ), (timestamp2, ), ...]}
-        self.requests = defaultdict(list)
+        # 存储格式：{key: deque([timestamp1, timestamp2, ...])}，按时间先后排列，过期的总在队首
+        self.requests = {}
         self.cleanup_interval = 300  # 5分钟清理一次过期记录
         self.last_cleanup = time.time()
+        # 当前一轮清理尚未检查的key（None 表示没有进行中的清理）
+        self._cleanup_keys = None
+        self._cleanup_deleted = 0
+        # 同一key的检查和记录在对应分片锁内完成；清理同一时间只允许一个线程进行
+        self._locks = [threading.Lock() for _ in range(LOCK_SHARDS)]
+        self._cleanup_lock = threading.Lock()
+    
+    def _lock_for(self, key):
+        """获取key所在分片的锁"""
+        return self._locks[hash(key) & (LOCK_SHARDS - 1)]
+    
+    def _evict_oldest_key(self):
+        """淘汰最早加入的key（dict 保持插入顺序）"""
+        try:
+            oldest = next(iter(self.requests))
+        except (StopIteration, RuntimeError):
+            # 其他线程同时修改了字典，本次不淘汰
+            return
+        # 不获取该key的分片锁（可能与当前持有的锁相同），最坏情况下丢失该key的一次计数
+        self.requests.pop(oldest, None)
     
     def _get_key(self, identifier):
         """生成唯一标识符"""
         return identifier
     
     def _cleanup(self):
-        """清理过期的请求记录"""
-        current_time = time.time()
-        if current_time - self.last_cleanup < self.cleanup_interval:
+        """
+        清理过期的请求记录
+        每个key的过期时间戳已在 is_allowed 中移除，这里只删除整体过期的key；
+        每轮清理分批进行，每次最多检查 CLEANUP_BATCH_SIZE 个key
+        """
+        # 未到清理时间时不加锁直接返回
+        if self._cleanup_keys is None and time.time() - self.last_cleanup < self.cleanup_interval:
+            return
+        # 其他线程正在清理时直接跳过
+        if not self._cleanup_lock.acquire(blocking=False):
             return
+        try:
+            self._cleanup_batch()
+        finally:
+            self._cleanup_lock.release()
+    
+    def _cleanup_batch(self):
+        """执行一批清理（调用方持有 _cleanup_lock）"""
+        current_time = time.time()
+        if self._cleanup_keys is None:
+            if current_time - self.last_cleanup < self.cleanup_interval:
+                return
+            # 开始新一轮清理（只复制key列表）
+            self._cleanup_keys = iter(list(self.requests))
+            self._cleanup_deleted = 0
         
-        # 清理1小时前的记录
+        # 最近一次请求在1小时前的key整体删除
         cutoff_time = current_time - 3600
-        keys_to_delete = []
-        
-        for key, timestamps in self.requests.items():
-            # 过滤掉过期的时间戳
-            self.requests[key] = [ts for ts in timestamps if ts > cutoff_time]
-            if not self.requests[key]:
-                keys_to_delete.append(key)
-        
-        # 删除空的key
-        for key in keys_to_delete:
-            del self.requests[key]
+        checked = 0
+        for key in islice(self._cleanup_keys, CLEANUP_BATCH_SIZE):
+            checked += 1
+            # 持有该key的分片锁再删除，避免删除正在被 is_allowed 记录的key
+            with self._lock_for(key):
+                timestamps = self.requests.get(key)
+                if timestamps is not None and (not timestamps or timestamps[-1] <= cutoff_time):
+                    del self.requests[key]
+                    self._cleanup_deleted += 1
         
-        self.last_cleanup = current_time
-        logger.debug(f"频率限制器清理完成，删除了 {len(keys_to_delete)} 个过期key")
+        if checked < CLEANUP_BATCH_SIZE:
+            # 本轮所有key已检查完
+            self._cleanup_keys = None
+            self.last_cleanup = current_time
+            logger.debug("频率限制器清理完成，删除了 %d 个过期key", self._cleanup_deleted)
     
     def is_allowed(self, key, limit, window):
         """
@@ -67,37 +126,36 @@ class RateLimiter:
         # 执行清理
         self._cleanup()
         
-        # 获取该key的请求记录
-        timestamps = self.requests[key]
-        
-        # 过滤掉时间窗口之外的请求
-        valid_timestamps = [ts for ts in timestamps if ts > cutoff_time]
-        self.requests[key] = valid_timestamps
-        
-        # 检查是否超过限制
-        if len(valid_timestamps) >= limit:
-            # 计算重置时间（最早的请求时间 + 时间窗口）
-            reset_time = valid_timestamps[0] + window
-            remaining = 0
-            allowed = False
-        else:
-            # 添加当前请求
-            self.requests[key].append(current_time)
-            remaining = limit - len(valid_timestamps) - 1
-            reset_time = current_time + window
-            allowed = True
+        with self._lock_for(key):
+            # 获取该key的请求记录
+            timestamps = self.requests.get(key)
+            if timestamps is None:
+                if len(self.requests) >= MAX_KEYS:
+                    self._evict_oldest_key()
+                timestamps = self.requests[key] = deque()
+            
+            # 移除时间窗口之外的请求（时间戳有序，只需从队首弹出）
+            while timestamps and timestamps[0] <= cutoff_time:
+                timestamps.popleft()
+            
+            # 检查是否超过限制
+            if len(timestamps) >= limit:
+                # 计算重置时间（最早的请求时间 + 时间窗口）
+                reset_time = timestamps[0] + window
+                remaining = 0
+                allowed = False
+            else:
+                # 添加当前请求
+                remaining = limit - len(timestamps) - 1
+                timestamps.append(current_time)
+                reset_time = current_time + window
+                allowed = True
         
         return allowed, remaining, reset_time
 
 # 全局频率限制器实例
 rate_limiter = RateLimiter()
 
-def get_client_ip():
-    """获取客户端真实IP地址"""
-    if request.headers.get('X-Forwarded-For'):
-        return request.headers.get('X-Forwarded-For').split(',')[0].strip()
-    return request.remote_addr
-
 def rate_limit(limit=100, window=60, key_func=None):
     """
     频率限制装饰器
@@ -114,6 +172,8 @@ def rate_limit(limit=100, window=60, key_func=None):
             pass
     """
     def decorator(f):
+        limit_str = str(limit)
+        
         @wraps(f)
         def wrapper(*args, **kwargs):
             # 生成限制key
@@ -131,11 +191,7 @@ def rate_limit(limit=100, window=60, key_func=None):
                 # 计算需要等待的时间
                 wait_seconds = int(reset_time - time.time())
                 
-                logger.warning(
-                    f"频率限制触发: IP={key}, "
-                    f"限制={limit}/{window}s, "
-                    f"路径={request.path}"
-                )
+                logger.warning("频率限制触发: IP=%s, 限制=%s/%ss, 路径=%s", key, limit, window, request.path)
                 
                 response = jsonify({
                     'error': '请求过于频繁，请稍后再试',
@@ -144,24 +200,26 @@ def rate_limit(limit=100, window=60, key_func=None):
                 })
                 response.status_code = 429
                 response.headers['Retry-After'] = str(wait_seconds)
-                response.headers['X-RateLimit-Limit'] = str(limit)
+                response.headers['X-RateLimit-Limit'] = limit_str
                 response.headers['X-RateLimit-Remaining'] = '0'
                 response.headers['X-RateLimit-Reset'] = str(int(reset_time))
                 return response
             
             # 添加频率限制响应头
             response = f(*args, **kwargs)
+            if not RATE_LIMIT_EXPOSE_HEADERS:
+                return response
             
             # 如果响应是元组（response, status_code），需要特殊处理
             if isinstance(response, tuple):
                 resp_obj, status_code = response[0], response[1]
                 if hasattr(resp_obj, 'headers'):
-                    resp_obj.headers['X-RateLimit-Limit'] = str(limit)
+                    resp_obj.headers['X-RateLimit-Limit'] = limit_str
                     resp_obj.headers['X-RateLimit-Remaining'] = str(remaining)
                     resp_obj.headers['X-RateLimit-Reset'] = str(int(reset_time))
                 return response
             elif hasattr(response, 'headers'):
-                response.headers['X-RateLimit-Limit'] = str(limit)
+                response.headers['X-RateLimit-Limit'] = limit_str
                 response.headers['X-RateLimit-Remaining'] = str(remaining)
                 response.headers['X-RateLimit-Reset'] = str(int(reset_time))
             
@@ -6,6 +6,8 @@ import time
 import hmac
 import hashlib
 import secrets
+from functools import lru_cache
+from operator import itemgetter
 from datetime import datetime, timedelta
 from flask import request, session, jsonify, current_app
 from models.database import db, AppConfig
@@ -13,6 +15,10 @@ from models.database import db, AppConfig
 REQUEST_TIMEOUT = 300  # 请求有效期5分钟
 KEY_ROTATION_INTERVAL = 3600  # 密钥轮换间隔（秒）- 1小时
 KEY_GRACE_PERIOD = 600  # 旧密钥宽限期（秒）- 10分钟
+# 密钥轮换相关的全部配置项，轮换时这些值会一起变化
+KEY_ROTATION_CONFIGS = ('api_request_key', 'api_request_key_expiry', 'api_request_key_old', 'api_request_key_old_expiry')
+
+_seen_api_key = None  # 本进程上次读到的当前密钥
 
 def generate_api_key():
     """生成随机API密钥"""
@@ -27,6 +33,12 @@ def get_current_api_key():
         
         current_time = time.time()
         
+        # 配置有进程内缓存，其他进程可能已经轮换过密钥；判定过期前先重新查库，避免重复轮换
+        if not key_data or not key_expiry or float(key_expiry) < current_time:
+            AppConfig.invalidate_config(*KEY_ROTATION_CONFIGS)
+            key_data = AppConfig.get_config('api_request_key', None)
+            key_expiry = AppConfig.get_config('api_request_key_expiry', None)
+        
         # 如果密钥不存在或已过期，生成新密钥
         if not key_data or not key_expiry or float(key_expiry) < current_time:
             new_key = generate_api_key()
@@ -43,6 +55,12 @@ def get_current_api_key():
             
             return new_key, None
         
+        # 当前密钥变化说明刚发生过轮换，旧密钥配置不能再用缓存中的值
+        global _seen_api_key
+        if key_data != _seen_api_key:
+            AppConfig.invalidate_config('api_request_key_old', 'api_request_key_old_expiry')
+            _seen_api_key = key_data
+        
         # 检查旧密钥是否还在宽限期内
         old_key = AppConfig.get_config('api_request_key_old', None)
         old_key_expiry = AppConfig.get_config('api_request_key_old_expiry', None)
@@ -62,6 +80,50 @@ def get_current_api_key():
             # 如果还是失败，返回None（验证将失败，但不会崩溃）
             return None, None
 
+def parse_timestamp(timestamp):
+    """
+    解析客户端时间戳（整数秒，前端为 Math.floor(Date.now() / 1000)）
+    整数解析失败时兼容带小数的旧格式；无效时返回None
+    """
+    try:
+        return int(timestamp)
+    except (TypeError, ValueError):
+        try:
+            return int(float(timestamp))
+        except (ValueError, OverflowError):
+            return None
+
+def is_timestamp_fresh(ts):
+    """时间戳是否在有效期内（整数秒比较）"""
+    return abs(int(time.time()) - ts) <= REQUEST_TIMEOUT
+
+def _build_sign_message(timestamp, params):
+    """构造待签名的字节串：时间戳 + 排序后的参数字符串"""
+    # 将参数字典转换为排序后的字符串（确保一致性）
+    # 字典的键互不相同，只按键排序，不比较整个 (键, 值) 元组
+    param_str = '&'.join([f'{k}={v}' for k, v in sorted(params.items(), key=itemgetter(0))])
+    
+    # 组合：时间戳 + 参数字符串
+    return f'{timestamp}&{param_str}'.encode('utf-8')
+
+@lru_cache(maxsize=4)
+def _hmac_template(key):
+    """
+    按密钥缓存已初始化的 HMAC 对象（有效密钥只有当前密钥和旧密钥两个）
+    每次签名 copy() 一份，省去密钥填充（ipad/opad）的两次 SHA-256 压缩
+    """
+    return hmac.new(key.encode('utf-8'), None, hashlib.sha256)
+
+def _hmac_sha256(key, message):
+    """HMAC-SHA256（原始字节）"""
+    h = _hmac_template(key).copy()
+    h.update(message)
+    return h.digest()
+
+def _hmac_sha256_hex(key, message):
+    """HMAC-SHA256（hex）"""
+    return _hmac_sha256(key, message).hex()
+
 def generate_signature(key, timestamp, params):
     """
     生成HMAC-SHA256签名
@@ -70,20 +132,7 @@ def generate_signature(key, timestamp, params):
     :param params: 参数字典
     :return: 签名（hex字符串）
     """
-    # 将参数字典转换为排序后的字符串（确保一致性）
-    param_str = '&'.join([f'{k}={v}' for k, v in sorted(params.items())])
-    
-    # 组合：时间戳 + 参数字符串
-    sign_string = f'{timestamp}&{param_str}'
-    
-    # 生成HMAC-SHA256签名
-    signature = hmac.new(
-        key.encode('utf-8'),
-        sign_string.encode('utf-8'),
-        hashlib.sha256
-    ).hexdigest()
-    
-    return signature
+    return _hmac_sha256_hex(key, _build_sign_message(timestamp, params))
 
 def verify_signature(signature, timestamp, params, keys):
     """
@@ -94,14 +143,22 @@ def verify_signature(signature, timestamp, params, keys):
     :param keys: 密钥列表（当前密钥和旧密钥）
     :return: 是否验证通过
     """
+    # 客户端签名解码为原始字节，与 HMAC 摘要直接比较，无需逐个密钥转hex
+    try:
+        signature_bytes = bytes.fromhex(signature)
+    except (TypeError, ValueError):
+        return False
+
+    # 待签名内容与密钥无关，只构造一次
+    message = _build_sign_message(timestamp, params)
+    matched = False
     for key in keys:
         if not key:
             continue
-        expected_signature = generate_signature(key, timestamp, params)
-        # 使用constant-time比较防止时序攻击
-        if hmac.compare_digest(signature, expected_signature):
-            return True
-    return False
+        expected = _hmac_sha256(key, message)
+        # 使用constant-time比较防止时序攻击；所有密钥都比较一遍，不暴露命中的是哪个密钥
+        matched |= hmac.compare_digest(signature_bytes, expected)
+    return matched
 
 def verify_api_request(require_login=False):
     """